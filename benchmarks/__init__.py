@@ -0,0 +1,23 @@
+"""Benchmarks of supycache.
+
+Every `bench_*` module can be run on its own, printing a table, or all of them
+together with ``python -m benchmarks``, which can also write the results as
+JSON (see `benchmarks.__main__`). The modules' `run()` functions return their
+results as a list of `result()` dicts.
+"""
+import timeit
+
+
+def result(benchmark, name, value, unit, **params):
+    """Returns one measurement as a dict that serializes to JSON as is."""
+    return {'benchmark': benchmark, 'name': name, 'params': params,
+            'value': value, 'unit': unit}
+
+
+def per_call(func, args=(), kwargs=None, number=100000, repeat=5):
+    """Returns the time per call of `func(*args, **kwargs)` in nanoseconds,
+    the best of `repeat` runs.
+    """
+    kwargs = kwargs or {}
+    timer = timeit.Timer(lambda: func(*args, **kwargs))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Runs all the benchmarks and writes their results as JSON.
+
+Usage: python -m benchmarks [--quick] [--output results.json] [names...]
+
+The JSON document holds the environment the benchmarks ran in and the list of
+results, each with the `benchmark` and `name` of the measurement, its
+`params`, `value` and `unit`, so that runs can be compared to spot
+regressions. The memcached benchmark is skipped when pylibmc or the
+memcached binary are not available.
+"""
+import argparse
+import importlib
+import json
+import platform
+import shutil
+import sys
+import time
+
+import supycache
+
+# - the arguments of each benchmark's run(), for a full and a --quick run
+BENCHMARKS = [
+    ('keys', (200000,), (20000,)),
+    ('decorator', (200000,), (20000,)),
+    ('dict_cache', (6, 100000), (4, 10000)),
+    ('contention', (100000,), (10000,)),
+    ('memcached', (10000,), (1000,)),
+    ('import', (20,), (3,)),
+]
+
+
+def available(name):
+    if name == 'memcached':
+        try:
+            import pylibmc  # noqa: F401
+        except ImportError:
+            return False
+        return shutil.which('memcached') is not None
+    return True
+
+
+def environment():
+    return {
+        'supycache': supycache.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('names', nargs='*',
+                        help='the benchmarks to run, all of them by default')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer iterations, for a smoke test')
+    parser.add_argument('--output', '-o', default='-',
+                        help='the file to write the JSON results to')
+    args = parser.parse_args(argv)
+
+    results, skipped = [], []
+    for name, full, quick in BENCHMARKS:
+        if args.names and name not in args.names:
+            continue
+        if not available(name):
+            skipped.append(name)
+            continue
+        module = importlib.import_module('benchmarks.bench_%s' % name)
+        sys.stderr.write('running %s\n' % name)
+        results.extend(module.run(*(quick if args.quick else full)))
+
+    report = {'environment': environment(), 'skipped': skipped,
+              'results': results}
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
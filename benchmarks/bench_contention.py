@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Multi-threaded contention benchmark of the in-process backends.
+
+Measures the throughput of a 90% get / 10% set workload, as the number of
+threads grows, for a `DictCache` guarded by a single global lock and for a
+`ShardedDictCache` with one lock per shard. On interpreters with a GIL the
+threads never run python code in parallel, so the numbers mostly show the cost
+of the locking; lock striping pays off on free-threaded builds.
+
+Usage: python -m benchmarks.bench_contention [operations_per_thread]
+"""
+import random
+import sys
+import threading
+import time
+
+from supycache.backends import DictCache, ShardedDictCache
+
+from . import result
+
+THREADS = (1, 2, 4, 8, 16)
+KEYS = ['key-%d' % i for i in range(10000)]
+
+
+class LockedDictCache(object):
+    """A `DictCache` with every method serialized behind one lock."""
+
+    def __init__(self, config=None):
+        self._cache = DictCache(config)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            return self._cache.set(key, value)
+
+
+def worker(cache, operations, seed, barrier):
+    rand = random.Random(seed)
+    keys = [rand.choice(KEYS) for _ in range(operations)]
+    barrier.wait()
+    for i, key in enumerate(keys):
+        if i % 10 == 0:
+            cache.set(key, i)
+        else:
+            cache.get(key)
+
+
+def throughput(cache, threads, operations):
+    """Returns the number of operations per second across `threads`."""
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=worker,
+                                args=(cache, operations, seed, barrier))
+               for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def run(operations=100000):
+    config = {'max_age': 60, 'max_entries': 5000}
+    backends = [
+        ('DictCache+lock', lambda: LockedDictCache(dict(config))),
+        ('Sharded(16)', lambda: ShardedDictCache(dict(config), shards=16)),
+        ('Sharded(64)', lambda: ShardedDictCache(dict(config), shards=64)),
+    ]
+    return [result('contention', name,
+                   throughput(make_backend(), threads, operations), 'ops/s',
+                   threads=threads)
+            for name, make_backend in backends for threads in THREADS]
+
+
+def main(operations=100000):
+    rows = run(operations)
+    print('%-16s' % 'threads' +
+          ''.join('%14d' % threads for threads in THREADS) + '   (ops/s)')
+    for i in range(0, len(rows), len(THREADS)):
+        print('%-16s' % rows[i]['name'] + ''.join(
+            '%14.0f' % row['value'] for row in rows[i:i + len(THREADS)]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
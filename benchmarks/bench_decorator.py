@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Per-call overhead of the `supycache` decorator.
+
+Measures, for each kind of `cache_key` template, the time of a cache hit and
+of a cache miss through a `DictCache`, next to a bare call of the function and
+to a hit of `functools.lru_cache`, as well as the time of a call expiring an
+`expire_key`. Misses are measured with a backend that never finds a value, so
+each call builds the key, looks it up, calls the function and stores its
+result. Expiries are measured with a backend that keeps the values it deletes,
+so that each call expires a key that is cached.
+
+Usage: python -m benchmarks.bench_decorator [number_of_calls]
+"""
+import functools
+import sys
+
+import supycache
+from supycache.backends import DictCache
+
+from . import per_call, result
+from .bench_keys import TEMPLATES
+
+
+class MissingDictCache(DictCache):
+    """A `DictCache` that never finds the values it stores."""
+
+    def get(self, key, default=None):
+        return default
+
+
+class KeepingDictCache(DictCache):
+    """A `DictCache` that keeps the values it deletes."""
+
+    def delete(self, key):
+        if key not in self.data:
+            raise KeyError(key)
+
+
+def function(*args, **kwargs):
+    return 'cached_value'
+
+
+def run(number=200000):
+    results = []
+    for name, template, args, kwargs in TEMPLATES:
+        def measure(case, func):
+            results.append(result('decorator', case,
+                                  per_call(func, args, kwargs, number), 'ns',
+                                  template=name))
+
+        measure('bare', function)
+        lru_cached = functools.lru_cache(maxsize=None)(function)
+        try:
+            lru_cached(*args, **kwargs)
+        except TypeError:
+            pass    # - lru_cache cannot cache calls with unhashable arguments
+        else:
+            measure('lru_cache hit', lru_cached)
+
+        cached = supycache.supycache(cache_key=template,
+                                     backend=DictCache())(function)
+        cached(*args, **kwargs)
+        measure('hit', cached)
+
+        missed = supycache.supycache(cache_key=template,
+                                     backend=MissingDictCache())(function)
+        measure('miss', missed)
+
+        backend = KeepingDictCache()
+        supycache.supycache(cache_key=template,
+                            backend=backend)(function)(*args, **kwargs)
+        expired = supycache.supycache(expire_key=template,
+                                      backend=backend)(function)
+        measure('expire', expired)
+    return results
+
+
+def main(number=200000):
+    cases = ('bare', 'lru_cache hit', 'hit', 'miss', 'expire')
+    times = dict(((row['params']['template'], row['name']), row['value'])
+                 for row in run(number))
+    print('%-12s' % 'template' +
+          ''.join('%15s' % case for case in cases) + '   (ns/call)')
+    for name, _, _, _ in TEMPLATES:
+        print('%-12s' % name + ''.join(
+            '%15.1f' % times[name, case] if (name, case) in times
+            else '%15s' % '-' for case in cases))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Cost of the `DictCache` operations as the number of entries grows.
+
+For 10^3 up to 10^`max_exponent` entries, with and without `max_age` or
+`max_bytes`, measures the time per entry of filling the cache and the time of getting
+and of overwriting random existing keys. With 10^7 entries the cache alone
+takes a few GB of memory, hence the default `max_exponent` of 6.
+
+Usage: python -m benchmarks.bench_dict_cache [max_exponent [operations]]
+"""
+import gc
+import random
+import sys
+import time
+
+from supycache.backends import DictCache
+
+from . import result
+
+CONFIGS = [
+    ('no max_age', {}),
+    ('max_age', {'max_age': 3600}),
+    # - a budget that is never reached, for the cost of sizing the values
+    ('max_bytes', {'max_bytes': 1 << 40}),
+]
+
+
+def measure(cache, size, operations):
+    """Returns the nanoseconds per fill, get and overwrite of `cache`."""
+    keys = ['key-%d' % i for i in range(size)]
+    sample = [random.choice(keys) for _ in range(operations)]
+    get, set = cache.get, cache.set
+
+    start = time.perf_counter()
+    for key in keys:
+        set(key, key)
+    fill = (time.perf_counter() - start) / size * 1e9
+
+    start = time.perf_counter()
+    for key in sample:
+        get(key)
+    hit = (time.perf_counter() - start) / operations * 1e9
+
+    start = time.perf_counter()
+    for key in sample:
+        set(key, key)
+    overwrite = (time.perf_counter() - start) / operations * 1e9
+    return fill, hit, overwrite
+
+
+def run(max_exponent=6, operations=100000):
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        size = 10 ** exponent
+        for name, config in CONFIGS:
+            cache = DictCache(dict(config))
+            gc.disable()
+            try:
+                timings = measure(cache, size, operations)
+            finally:
+                gc.enable()
+            for case, value in zip(('fill', 'get', 'overwrite'), timings):
+                results.append(result('dict_cache', case, value, 'ns',
+                                      config=name, entries=size))
+            cache.clear()
+    return results
+
+
+def main(max_exponent=6, operations=100000):
+    cases = ('fill', 'get', 'overwrite')
+    rows = run(max_exponent, operations)
+    print('%-12s %10s' % ('config', 'entries') +
+          ''.join('%12s' % case for case in cases) + '   (ns/op)')
+    for i in range(0, len(rows), len(cases)):
+        params = rows[i]['params']
+        print('%-12s %10d' % (params['config'], params['entries']) +
+              ''.join('%12.1f' % row['value']
+                      for row in rows[i:i + len(cases)]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
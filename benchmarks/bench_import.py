@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the time it takes to import supycache.
+
+Each measurement runs a new interpreter, the best of `repeat` runs, less the
+time it takes to start an interpreter that imports nothing. Also lists the
+modules of the backends' dependencies that importing supycache pulls in,
+which should be none of them.
+
+Usage: python -m benchmarks.bench_import [repeat]
+"""
+import subprocess
+import sys
+import time
+
+from . import result
+
+STATEMENTS = [
+    ('supycache', 'import supycache'),
+    ('supycache.backends', 'import supycache.backends'),
+    ('memory backend', "import supycache; "
+                       "supycache.set_default_backend('memory://')"),
+]
+
+# - the modules that only the backends that use them should import
+HEAVY_MODULES = ('pylibmc', 'sqlite3', 'multiprocessing', 'asyncio',
+                 'concurrent.futures', 'urllib.parse')
+
+
+def startup(statement, repeat):
+    """Returns the time, in milliseconds, to start an interpreter and run
+    `statement`, the best of `repeat` runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+
+def imported_modules(statement):
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        '%s; import sys; print(" ".join(sys.modules))' % statement])
+    return set(output.decode('ascii').split())
+
+
+def run(repeat=20):
+    baseline = startup('pass', repeat)
+    results = []
+    for name, statement in STATEMENTS:
+        modules = imported_modules(statement)
+        results.append(result(
+            'import', name, startup(statement, repeat) - baseline, 'ms',
+            heavy_modules=sorted(set(HEAVY_MODULES) & modules)))
+    return results
+
+
+def main(repeat=20):
+    print('%-20s %10s   %s' % ('import', 'time (ms)', 'heavy modules'))
+    for row in run(repeat):
+        print('%-20s %10.1f   %s' % (
+            row['name'], row['value'],
+            ', '.join(row['params']['heavy_modules']) or '-'))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Micro-benchmark of the per-call cost of building cache keys.
+
+Compares resolving the `cache_key` template on every call, the way the
+decorator used to (`callable()` check followed by `.format()`), against the
+key builders compiled once by `supycache.keys.compile_key`.
+
+Usage: python -m benchmarks.bench_keys [number_of_calls]
+"""
+import sys
+
+from supycache.keys import compile_key
+
+from . import per_call, result
+
+
+class User:
+    def __init__(self, name):
+        self.name = name
+
+
+TEMPLATES = [
+    ('constant', 'simple_key', ('some', 1), {}),
+    ('positional', '{0}', ('some', 1), {}),
+    ('keyword', '{0}_{keyword}', ('some', 1), {'keyword': 'key'}),
+    ('attribute', '{0}_{user_obj.name}', ('some',), {'user_obj': User('steve')}),
+    ('item', '{choices[0]}_{menu[lunch]}', ('ignored',),
+     {'choices': ['small'], 'menu': {'lunch': 'pizza'}}),
+]
+
+
+def legacy_key(template):
+    def build_key(*args, **kwargs):
+        return template(*args, **kwargs) if callable(template) \
+            else template.format(*args, **kwargs)
+    return build_key
+
+
+def run(number=200000):
+    results = []
+    for name, template, args, kwargs in TEMPLATES:
+        results.append(result('keys', 'format', per_call(
+            legacy_key(template), args, kwargs, number), 'ns', template=name))
+        results.append(result('keys', 'compiled', per_call(
+            compile_key(template), args, kwargs, number), 'ns', template=name))
+    return results
+
+
+def main(number=200000):
+    times = dict(((row['params']['template'], row['name']), row['value'])
+                 for row in run(number))
+    print('%-12s %14s %14s %8s' % (
+        'template', 'format (ns)', 'compiled (ns)', 'speedup'))
+    for name, _, _, _ in TEMPLATES:
+        before, after = times[name, 'format'], times[name, 'compiled']
+        print('%-12s %14.1f %14.1f %7.2fx' % (
+            name, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Throughput of `MemcachedCache` as the number of threads grows.
+
+Starts a local memcached process (the `memcached` binary must be on the
+PATH, and pylibmc installed) and measures a 90% get / 10% set workload for a
+bounded pool of clients of a few sizes and for a thread-mapped pool.
+
+Usage: python -m benchmarks.bench_memcached [operations_per_thread]
+"""
+import contextlib
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from supycache.backends.memcached import MemcachedCache
+
+from . import result
+
+THREADS = (1, 2, 4, 8, 16, 32)
+
+
+def free_port():
+    with contextlib.closing(socket.socket()) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def memcached_server():
+    """Runs a local memcached process, yields its address."""
+    port = free_port()
+    process = subprocess.Popen(['memcached', '-l', '127.0.0.1',
+                                '-p', str(port), '-U', '0', '-m', '256'])
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port), 0.1).close()
+                break
+            except socket.error:
+                time.sleep(0.05)
+        yield '127.0.0.1:%d' % port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def worker(cache, operations, barrier):
+    barrier.wait()
+    for i in range(operations):
+        key = 'key-%d' % (i % 1000)
+        if i % 10 == 0:
+            cache.set(key, i)
+        else:
+            cache.get(key)
+
+
+def throughput(cache, threads, operations):
+    """Returns the number of operations per second across `threads`."""
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=worker,
+                                args=(cache, operations, barrier))
+               for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def run(operations=10000):
+    backends = [
+        ('pool_size=1', dict(pool_size=1, pool_timeout=None)),
+        ('pool_size=4', dict(pool_size=4, pool_timeout=None)),
+        ('pool_size=16', dict(pool_size=16, pool_timeout=None)),
+        ('thread_mapped', dict(thread_mapped=True)),
+    ]
+    results = []
+    with memcached_server() as server:
+        for name, options in backends:
+            cache = MemcachedCache([server], binary=True, **options)
+            results.extend(
+                result('memcached', name,
+                       throughput(cache, threads, operations), 'ops/s',
+                       threads=threads)
+                for threads in THREADS)
+    return results
+
+
+def main(operations=10000):
+    rows = run(operations)
+    print('%-16s' % 'threads' +
+          ''.join('%12d' % threads for threads in THREADS) + '   (ops/s)')
+    for i in range(0, len(rows), len(THREADS)):
+        print('%-16s' % rows[i]['name'] + ''.join(
+            '%12.0f' % row['value'] for row in rows[i:i + len(THREADS)]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -30,13 +30,16 @@ setup(
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Libraries',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         ],
+    python_requires = '>=3.7',
     keywords = 'cache, caching, memcached, redis, memoize, memoization',
-    packages = find_packages(exclude=['contrib', 'docs', 'tests*']),
+    packages = find_packages(exclude=['benchmarks*', 'contrib', 'docs', 'tests*']),
 )
 
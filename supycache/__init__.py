@@ -11,8 +11,12 @@ __author__ = "Steven Fernandez <steve@lonetwin.net>"
 __license__ = "MIT"
 __version__ = '0.3.0'
 
-from .backends import DictCache
-from .cdf import CacheDecoratorFactory
+from .backends import DictCache, InstanceCache, from_url
+from .backends import tagged as _tagged
+from .breaker import CircuitBreaker, breaker_states
+from .cdf import CacheDecoratorFactory, bound_tag, key_checker
+from .keys import AUTO
+from .stats import cache_stats
 
 default_backend = None
 
@@ -26,15 +30,19 @@ def get_default_backend():
     methods.
     """
     global default_backend
-    if not default_backend:
+    if default_backend is None:
         default_backend = DictCache()
     return default_backend
 
 
 def set_default_backend(backend):
-    """Sets the `default_backend`.
+    """Sets the `default_backend`, either a backend or a URL configuring one,
+    like `'memcached://127.0.0.1:11211?pool=8'` or
+    `'memory://?max_entries=100000'` (see `supycache.backends.registry`).
     """
     global default_backend
+    if isinstance(backend, str):
+        backend = from_url(backend)
     default_backend = backend
 
 
@@ -45,36 +53,159 @@ def supycache(**options):
     the following parameters:
 
     - `backend` : The `backend` cache store to use for this cache key, if it is
-        different than `supycache.default_backend`.
+        different than `supycache.default_backend`, or a URL configuring one
+        (see `set_default_backend()`).
 
     - `cache_key` : Either a simple string, a format string or callable used to
         create the key used for caching the result of the function being
         decorated. This key will be resolved at run-time and would be evaluated
         against/with the parameters passed to the function being decorated.
+        If `'auto'`, or if none of `cache_key`, `expire_key`, `expire_tags` or
+        `update_key` are passed, the key is built from the name of the
+        function and a digest of all of its arguments (see
+        `supycache.keys.auto_key`), which need not be hashable.
 
     - `expire_key` : Either a simple string, a format string or callable used
         to create the key that would be expired before the decorated function
         is called. This key will be resolved at run-time and would be evaluated
         against/with the parameters pass to the function being decorated.
 
+    - `update_key` : Either a simple string, a format string or callable used
+        to create the key that the result of the decorated function is written
+        to, once it returns, so that the next read of the key is a hit rather
+        than a miss. It may be combined with an `expire_key` (and
+        `expire_tags`) to expire other keys before the function is called. A
+        `None` result deletes the key instead, unless `negative_ttl` is set.
+        The key must not be read with `stale_while_revalidate`.
+
+    - `max_age` : The number of seconds to cache the results of the decorated
+        function for, passed as the `ttl` to the backend's `set()`. It only
+        applies to this function's results, other values in the backend keep
+        the backend's own default (for instance, the `max_age` in the config
+        of a `DictCache`), if any.
+
+    - `ttl_jitter` : A fraction, between 0 and 1, by which the `max_age` (and
+        `negative_ttl`) of each cached result is randomly shortened, so that
+        results cached at the same time do not all expire, and get recomputed,
+        together.
+
+    - `batched` : A boolean to indicate that the decorated function accepts a
+        list of items (for instance, ids) as its first argument and returns a
+        dict mapping each of them to its result (or a list of results in the
+        same order). The `cache_key` is resolved for each item as if it were
+        passed in place of the list. Cached results are fetched with one
+        `get_many()` call, the function is called with just the missing items
+        and their results are cached with one `set_many()` call. The decorated
+        function returns a dict mapping the items to their results.
+
+    - `tags` : A list of simple strings, format strings or callables, resolved
+        like the `cache_key`, naming the tags of the cached result. Once any
+        of its tags is invalidated, the result is a miss. Invalidating a tag
+        takes a single write to the backend, however many results have it.
+
+    - `expire_tags` : A list of tags, resolved like the `expire_key`, to
+        invalidate before the decorated function is called.
+
+    - `hash_keys` : A boolean to indicate whether all the keys should be
+        replaced with a digest (a readable prefix of the key followed by its
+        blake2b hash). Otherwise, only the keys the backend does not accept as
+        they are get replaced, for instance the keys longer than 250 bytes or
+        with spaces for memcached, or longer than the `max_key_length` in the
+        config of a `DictCache`.
+
+    - `key_namespace` : A string all the keys and tags are prefixed with.
+
     - `ignore_errors` : A boolean to indicate whether errors in getting,
         setting or expiring cache should be ignored or re-raised on being
         caught.
 
+    - `negative_ttl` : The number of seconds to cache a `None` returned by the
+        decorated function for. By default, `None` is not cached while all
+        other values, including false ones like `0`, `''` or `[]`, are.
+        The backend must derive from `BaseCache`.
+
+    - `single_flight` : A boolean to indicate whether concurrent calls that
+        miss the cache for the same key should wait for just one of them to
+        call the decorated function and share its result (or exception),
+        rather than all of them calling it.
+
+    - `stale_while_revalidate` : The number of seconds, after `max_age` has
+        passed, for which the stale cached value is still returned while a
+        single call of the decorated function refreshes it on a background
+        thread pool. Callers only wait for the function when the value is
+        missing or older than `max_age + stale_while_revalidate`. The
+        backend must derive from `supycache.backends.base.BaseCache` and,
+        since the refreshes run on other threads, be thread-safe: the
+        default `DictCache` is not, use a `ShardedDictCache` (or any shared
+        cache server) instead. Coroutine functions are refreshed on the
+        event loop, so this does not apply to them.
+
+    - `per_instance` : A boolean to indicate that the decorated function is a
+        method whose results are cached for each instance separately. The
+        `cache_key` is resolved against the arguments that follow the
+        instance (so `'{0}'` is the first of them) and the results are cached
+        in-process in an `InstanceCache` of the method's own (or in the one
+        passed as the `backend`), which drops those of an instance once it
+        is garbage collected. Given another backend, the keys are prefixed
+        with a random token of the instance instead. Instances are only
+        weakly referenced. Not supported with `tags` or `batched`.
+
+    - `refresh_executor` : The `concurrent.futures.Executor` to refresh stale
+        values on, instead of a thread pool shared by all decorators.
+
+    - `circuit_breaker` : `True`, to share a `supycache.CircuitBreaker` with
+        all the decorators using the same backend, or a `CircuitBreaker` of
+        its own. Once the backend fails `failure_threshold` times in a row,
+        the breaker opens and the decorated function is called without
+        touching the backend for `cooldown` seconds, after which a single
+        call probes the backend again. `supycache.breaker_states()` returns
+        the state of all the breakers.
+
+    The decorated function gets a `cache_info()` method returning the
+    `supycache.stats.CacheInfo` of its hits, misses, ignored errors and time
+    spent in the backend and in the function itself, and a
+    `cache_stats_reset()` method to zero them. `supycache.cache_stats()`
+    returns those of all decorated functions. Its `circuit_breaker`
+    attribute is the breaker it uses, if any.
+
     """
-    recognized_options = {'backend',
-                          'cache_key',
-                          'expire_key',
-                          'ignore_errors',
-                          }
+    key_options = {'cache_key',
+                   'expire_key',
+                   'expire_tags',
+                   'update_key',
+                   }
 
-    if recognized_options.isdisjoint(options):
-        raise KeyError('expecting one of %s as an argument' %
-                       ', '.join(recognized_options))
+    if key_options.isdisjoint(options):
+        options['cache_key'] = AUTO
 
-    backend = options.pop('backend', get_default_backend())
+    backend = options.pop('backend', None)
+    if isinstance(backend, str):
+        backend = from_url(backend)
+    elif backend is None and not options.get('per_instance'):
+        backend = get_default_backend()
 
     def prepare_inner(function):
-        cdf = CacheDecoratorFactory(backend, **options)
+        # - with `per_instance`, each method gets an `InstanceCache` of its
+        # own, unless given a backend
+        cdf = CacheDecoratorFactory(
+            backend if backend is not None else InstanceCache(), **options)
         return cdf(function)
     return prepare_inner
+
+
+def invalidate_tags(*tags, **kwargs):
+    """Makes every value cached with any of `tags` a miss, in the `backend`
+    passed as a keyword argument or in the `default_backend`. The tags are
+    built as the decorators build them, so pass the same `key_namespace` and
+    `hash_keys` keyword arguments as the decorators that tagged the values.
+    """
+    backend = kwargs.get('backend')
+    if backend is None:
+        backend = get_default_backend()
+    key_namespace = kwargs.get('key_namespace', '')
+    key_allowed = key_checker(backend, kwargs.get('hash_keys', False),
+                              key_namespace)
+    if key_allowed is not None:
+        build_tag = bound_tag(str, key_allowed, key_namespace)
+        tags = [build_tag(tag) for tag in tags]
+    _tagged.invalidate_tags(backend, tags)
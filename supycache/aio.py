@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""The wrappers `CacheDecoratorFactory` uses for coroutine functions.
+
+These await the backend methods if they are coroutine functions themselves
+(ie: for `supycache.backends.aio.AsyncBaseCache` backends) and call them
+directly otherwise. Concurrent awaits that miss the cache for the same key
+share a single call of the decorated coroutine function.
+"""
+import asyncio
+import time
+from collections.abc import Mapping
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from .backends.base import BaseCache, MISS
+from .backends.tagged import new_generation, tag_key
+from .stats import HITS, MISSES, ERRORS, BACKEND_CALLS, BACKEND_TIME, \
+    COMPUTE_TIME
+
+timer = time.perf_counter
+
+
+def _backend_method(backend, name):
+    """Returns the backend method `name` as a coroutine function."""
+    method = getattr(backend, name)
+    if iscoroutinefunction(method):
+        return method
+
+    async def call(*args, **kwargs):
+        return method(*args, **kwargs)
+    return call
+
+
+def _backend_delete(backend):
+    """Returns the backend `delete()` as a coroutine function that ignores
+    the keys that are not cached.
+    """
+    delete = _backend_method(backend, 'delete')
+
+    async def backend_delete(key):
+        try:
+            await delete(key)
+        except KeyError:
+            pass
+    return backend_delete
+
+
+def _backend_get(backend):
+    """Returns the backend `get()` as a coroutine function returning `MISS`
+    on a miss, like `CacheDecoratorFactory` does for sync functions.
+    """
+    get = _backend_method(backend, 'get')
+    if isinstance(backend, BaseCache):
+        async def backend_get(key):
+            return await get(key, MISS)
+    else:
+        async def backend_get(key):
+            value = await get(key)
+            return MISS if value is None else value
+    return backend_get
+
+
+async def _call_backend(cdf, method, default, *args, **kwargs):
+    """Awaits the backend `method`, counting the call in the statistics of
+    `cdf`, and returns `default` if it fails and errors are ignored, or if the
+    circuit breaker of `cdf` is open.
+    """
+    breaker = cdf.circuit_breaker
+    if breaker is not None and not breaker.allow():
+        return default
+    counters = cdf.stats.counters()
+    start = timer()
+    try:
+        result = await method(*args, **kwargs)
+    except Exception:
+        if breaker is not None:
+            breaker.failure()
+        if not cdf.ignore_errors:
+            raise
+        counters[ERRORS] += 1
+        return default
+    finally:
+        elapsed = timer() - start
+        counters[BACKEND_CALLS] += 1
+        counters[BACKEND_TIME] += elapsed
+    if breaker is not None:
+        breaker.success(elapsed)
+    return result
+
+
+async def _store(cdf, set, key, value, ttl=None):
+    """Caches `value` with the `ttl` (or `max_age`) of `cdf`, jittered."""
+    ttl = cdf._ttl(ttl or cdf._default_ttl)
+    if ttl:
+        await _call_backend(cdf, set, None, key, value, ttl=ttl)
+    else:
+        await _call_backend(cdf, set, None, key, value)
+
+
+async def _call_func(cdf, func, *args, **kwargs):
+    start = timer()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        cdf.stats.counters()[COMPUTE_TIME] += timer() - start
+
+
+def _deduplicated(load):
+    """Returns a coroutine function that awaits `load(key, args, kwargs)`
+    just once for all concurrent calls with the same `key`.
+    """
+    pending = {}
+
+    def done(key, task):
+        if pending.get(key) is task:
+            del pending[key]
+
+    async def deduplicated_load(key, args, kwargs):
+        task = pending.get(key)
+        if task is None:
+            task = pending[key] = asyncio.ensure_future(load(key, args, kwargs))
+            task.add_done_callback(lambda task: done(key, task))
+        # - so that cancelling one of the callers does not cancel the load
+        # for all the others
+        return await asyncio.shield(task)
+    return deduplicated_load
+
+
+def expiry_wrapper(cdf, func):
+    build_key = cdf._build_key if cdf.key else None
+    build_tags = cdf._build_tags
+    delete = _backend_delete(cdf._backend)
+    set = _backend_method(cdf._backend, 'set')
+
+    async def invalidate_tags(tags):
+        for tag in tags:
+            await set(tag_key(tag), new_generation())
+
+    @wraps(func)
+    async def cache_deleter(*args, **kwargs):
+        if build_key is not None:
+            await _call_backend(cdf, delete, None, build_key(*args, **kwargs))
+        if build_tags:
+            await _call_backend(cdf, invalidate_tags, None,
+                                [build_tag(*args, **kwargs)
+                                 for build_tag in build_tags])
+        return await func(*args, **kwargs)
+    return cache_deleter
+
+
+def update_wrapper(cdf, func):
+    build_key = cdf._build_update_key
+    call = expiry_wrapper(cdf, func) if cdf._expiring else func
+    set = _backend_method(cdf._backend, 'set')
+    delete = _backend_delete(cdf._backend)
+
+    @wraps(func)
+    async def cache_updater(*args, **kwargs):
+        key = build_key(*args, **kwargs)
+        result = await call(*args, **kwargs)
+        if result is not None:
+            await _store(cdf, set, key, result)
+        elif cdf.negative_ttl:
+            await _store(cdf, set, key, result, cdf.negative_ttl)
+        else:
+            await _call_backend(cdf, delete, None, key)
+        return result
+    return cache_updater
+
+
+def caching_wrapper(cdf, func):
+    build_key = cdf._build_key
+    get = _backend_get(cdf._backend)
+    set = _backend_method(cdf._backend, 'set')
+
+    async def compute(key, args, kwargs):
+        result = await _call_func(cdf, func, *args, **kwargs)
+        if result is not None:
+            await _store(cdf, set, key, result)
+        elif cdf.negative_ttl:
+            await _store(cdf, set, key, result, cdf.negative_ttl)
+        return result
+    compute = _deduplicated(compute)
+
+    @wraps(func)
+    async def cache_setter(*args, **kwargs):
+        key = build_key(*args, **kwargs)
+        result = await _call_backend(cdf, get, MISS, key)
+        if result is not MISS:
+            cdf.stats.counters()[HITS] += 1
+        else:
+            cdf.stats.counters()[MISSES] += 1
+            result = await compute(key, args, kwargs)
+
+        return result
+    return cache_setter
+
+
+def batch_caching_wrapper(cdf, func):
+    build_key = cdf._build_key
+    get_many = _backend_method(cdf._backend, 'get_many')
+    set_many = _backend_method(cdf._backend, 'set_many')
+
+    async def store(mapping, ttl):
+        for group, ttl in cdf._ttl_groups(mapping, ttl):
+            if ttl:
+                await _call_backend(cdf, set_many, None, group, ttl=ttl)
+            else:
+                await _call_backend(cdf, set_many, None, group)
+
+    @wraps(func)
+    async def batch_cache_setter(items, *args, **kwargs):
+        keys = dict((item, build_key(item, *args, **kwargs)) for item in items)
+        cached = await _call_backend(cdf, get_many, {}, list(keys.values()))
+        results = dict((item, cached[key]) for item, key in keys.items()
+                       if key in cached)
+        missing = [item for item in keys if item not in results]
+        counters = cdf.stats.counters()
+        counters[HITS] += len(results)
+        counters[MISSES] += len(missing)
+        if missing:
+            computed = await _call_func(cdf, func, missing, *args, **kwargs)
+            if not isinstance(computed, Mapping):
+                computed = dict(zip(missing, computed))
+            results.update(computed)
+            computed = dict((keys[item], value)
+                            for item, value in computed.items()
+                            if item in keys)
+            values = dict((key, value) for key, value in computed.items()
+                          if value is not None)
+            if values:
+                await store(values, cdf._default_ttl)
+            if cdf.negative_ttl and len(values) < len(computed):
+                await store(dict((key, None) for key in computed
+                                 if key not in values), cdf.negative_ttl)
+
+        return dict((item, results[item]) for item in keys if item in results)
+    return batch_cache_setter
+
+
+def stale_caching_wrapper(cdf, func):
+    build_key = cdf._build_key
+    get_entry = _backend_method(cdf._backend, 'get_entry')
+    set_entry = _backend_method(cdf._backend, 'set_entry')
+    max_age, grace = cdf.max_age, cdf.stale_while_revalidate
+    refreshing = {}
+
+    async def compute(key, args, kwargs):
+        result = await _call_func(cdf, func, *args, **kwargs)
+        ttl = cdf._ttl(max_age if result is not None else cdf.negative_ttl)
+        if ttl:
+            await _call_backend(cdf, set_entry, None, key, result,
+                                time.time() + ttl, ttl + grace)
+        return result
+    compute = _deduplicated(compute)
+
+    async def refresh(key, args, kwargs):
+        try:
+            await compute(key, args, kwargs)
+        except Exception:
+            pass    # - the next caller past the grace window gets the error
+        finally:
+            del refreshing[key]
+
+    @wraps(func)
+    async def stale_cache_setter(*args, **kwargs):
+        key = build_key(*args, **kwargs)
+        entry = await _call_backend(cdf, get_entry, None, key)
+        counters = cdf.stats.counters()
+        if entry:
+            value, soft_expiry = entry
+            now = time.time()
+            if now < soft_expiry:
+                counters[HITS] += 1
+                return value
+
+            if now < soft_expiry + grace:
+                # - serve the stale value, while (just one) refresh runs in
+                # the background. The task is referenced until it is done.
+                if key not in refreshing:
+                    refreshing[key] = asyncio.ensure_future(
+                        refresh(key, args, kwargs))
+                counters[HITS] += 1
+                return value
+
+        counters[MISSES] += 1
+        return await compute(key, args, kwargs)
+    return stale_cache_setter
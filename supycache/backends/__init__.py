@@ -1,10 +1,43 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import warnings
-from .dict_cache import DictCache
-
-try:
-    from .memcached import MemcachedCache
-except ImportError:
-    warnings.warn('missing optional dependency: pylibmc, '
-                  'MemcachedCache backend will not be available')
+"""The cache backends.
+
+The backend classes are imported from their modules when first used, so that
+importing `supycache` does not import the dependencies (pylibmc, sqlite3,
+multiprocessing...) of the backends that are not used. `from_url()` returns
+a backend configured by a URL (see `supycache.backends.registry`).
+"""
+import importlib
+
+from .registry import backend_class, from_url, register_backend
+
+# - the module of each backend class
+_modules = {
+    'DictCache': 'dict_cache',
+    'ShardedDictCache': 'sharded',
+    'SQLiteCache': 'sqlite',
+    'SharedMemoryCache': 'shared_memory',
+    'InstanceCache': 'instance',
+    'TaggedCache': 'tagged',
+    'TieredCache': 'tiered',
+    'MemcachedCache': 'memcached',
+}
+
+__all__ = sorted(_modules) + ['backend_class', 'from_url',
+                              'register_backend']
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    try:
+        module = importlib.import_module('.' + _modules[name], __name__)
+    except ImportError as error:
+        raise ImportError('%s is not available: %s' % (name, error))
+    value = globals()[name] = getattr(module, name)
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Backends for use with coroutine functions, which may be awaited without
+blocking the event loop.
+"""
+from .base import BaseCache, MISS
+from .dict_cache import DictCache
+
+
+class AsyncBaseCache(BaseCache):  # pragma: no cover
+
+    async def get(self, key, default=None):
+        raise NotImplementedError()
+
+    async def set(self, key, value, ttl=None):
+        raise NotImplementedError()
+
+    async def delete(self, key):
+        raise NotImplementedError()
+
+    async def clear(self):
+        raise NotImplementedError()
+
+    async def get_many(self, keys):
+        values = {}
+        for key in keys:
+            value = await self.get(key, MISS)
+            if value is not MISS:
+                values[key] = value
+        return values
+
+    async def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            await self.set(key, value, ttl=ttl)
+
+    async def delete_many(self, keys):
+        for key in keys:
+            try:
+                await self.delete(key)
+            except KeyError:
+                pass
+
+    async def get_entry(self, key, default=None):
+        return await self.get(key, default)
+
+    async def set_entry(self, key, value, soft_expiry, ttl):
+        return await self.set(key, (value, soft_expiry), ttl=ttl)
+
+
+class AsyncDictCache(AsyncBaseCache):
+    """An in-process cache backend for coroutine functions.
+
+    Accepts the same `config` as `DictCache`. None of the methods await
+    anything while updating the cache, so they are safe to call from any
+    number of tasks on the event loop.
+    """
+
+    def __init__(self, config=None):
+        self._cache = DictCache(config)
+
+    @property
+    def config(self):
+        return self._cache.config
+
+    @property
+    def data(self):
+        return self._cache.data
+
+    async def get(self, key, default=None):
+        return self._cache.get(key, default)
+
+    async def set(self, key, value, ttl=None):
+        return self._cache.set(key, value, ttl)
+
+    async def delete(self, key):
+        return self._cache.delete(key)
+
+    async def clear(self):
+        return self._cache.clear()
+
+    async def get_many(self, keys):
+        return self._cache.get_many(keys)
+
+    async def set_many(self, mapping, ttl=None):
+        return self._cache.set_many(mapping, ttl)
+
+    async def delete_many(self, keys):
+        return self._cache.delete_many(keys)
+
+    async def get_entry(self, key, default=None):
+        return self._cache.get_entry(key, default)
+
+    async def set_entry(self, key, value, soft_expiry, ttl):
+        return self._cache.set_entry(key, value, soft_expiry, ttl)
+
+    def purge_expired(self):
+        return self._cache.purge_expired()
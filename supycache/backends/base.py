@@ -2,15 +2,44 @@
 # -*- coding: utf-8 -*-
 
 
+class _Miss(object):
+    """The type of `MISS`, the default `CacheDecoratorFactory` passes to
+    `get()`, so that it can tell a miss from any cached value, including
+    `None` and other false values.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISS'
+
+    def __bool__(self):
+        return False
+    __nonzero__ = __bool__
+
+
+MISS = _Miss()
+
+
 class BaseCache(object):  # pragma: no cover
 
     def __init__(self, config=None):
-        self.config = config if config else {}
+        self.config = config if config is not None else {}
+
+    @classmethod
+    def from_url(cls, url):
+        """Returns a backend configured by `url`, a `urlsplit()` result (see
+        `supycache.backends.registry`). By default, the query parameters are
+        its `config`.
+        """
+        from .registry import url_options
+        return cls(config=url_options(url))
 
-    def get(self):
+    def get(self, key, default=None):
+        """Returns the value cached for `key`, or `default` on a miss."""
         raise NotImplementedError()
 
-    def set(self, key, value):
+    def set(self, key, value, ttl=None):
+        """Caches `value` for `key`, for `ttl` seconds if it is given."""
         raise NotImplementedError()
 
     def delete(self, key):
@@ -18,3 +47,49 @@ class BaseCache(object):  # pragma: no cover
 
     def clear(self):
         raise NotImplementedError()
+
+    def get_many(self, keys):
+        """Returns a dict of the values cached for those of `keys` that are
+        not a miss.
+        """
+        values = {}
+        for key in keys:
+            value = self.get(key, MISS)
+            if value is not MISS:
+                values[key] = value
+        return values
+
+    def set_many(self, mapping, ttl=None):
+        """Caches all the values in `mapping`, for `ttl` seconds if given."""
+        for key, value in mapping.items():
+            self.set(key, value, ttl=ttl)
+
+    def delete_many(self, keys):
+        for key in keys:
+            try:
+                self.delete(key)
+            except KeyError:
+                pass
+
+    @property
+    def restricts_keys(self):
+        """Whether `key_allowed()` might return `False` for some keys."""
+        return bool(self.config.get('max_key_length'))
+
+    def key_allowed(self, key):
+        """Returns whether `key` can be used as is, rather than replaced with
+        a digest by the decorators. By default, keys longer than the
+        `max_key_length` in the config, if any, are not.
+        """
+        max_key_length = self.config.get('max_key_length')
+        return not max_key_length or len(key) <= max_key_length
+
+    def get_entry(self, key, default=None):
+        """Returns the `(value, soft_expiry)` stored by `set_entry()`."""
+        return self.get(key, default)
+
+    def set_entry(self, key, value, soft_expiry, ttl):
+        """Stores `value` along with the time after which it is stale, for at
+        least `ttl` seconds.
+        """
+        return self.set(key, (value, soft_expiry), ttl=ttl)
@@ -1,46 +1,243 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import heapq
+import itertools
+import pickle
+import sys
 import time
-from collections import defaultdict
 from .base import BaseCache
+from .eviction import make_policy
+
+_NEVER = float('inf')
+
+
+def serialized_size(value):
+    """Returns the length of `value` pickled, or its `sys.getsizeof()` if it
+    cannot be pickled, as an estimate of the memory it takes.
+    """
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
 
 
 class DictCache(BaseCache):
+    """An in-process cache backend.
+
+    Recognized `config` options:
+
+    - `max_age` : The number of seconds after which a cached value expires,
+        unless a `ttl` is passed to `set()`.
+
+    - `max_entries` : The maximum number of values to hold. Once full, storing
+        a new key evicts an existing one, chosen by the `eviction_policy`.
+
+    - `max_bytes` : The maximum estimated size, in bytes, of the values to
+        hold. Once full, storing a new value evicts existing ones, chosen by
+        the `eviction_policy`, until it fits. Values larger than `max_bytes`
+        are not stored.
+
+    - `sizer` : A function returning the estimated size of a value, in bytes,
+        by default `serialized_size()`, the length of the value pickled.
+
+    - `eviction_policy` : One of 'lru' (the default), 'lfu', 'fifo' or 'gds'
+        (the default with `max_bytes`, evicting large, rarely used values
+        first), or an `supycache.backends.eviction.EvictionPolicy` subclass.
+
+    - `max_key_length` : The length of the keys above which the decorators
+        replace them with a (shorter) digest.
+
+    Values are stored as `(value, expiry_time)` tuples in `data`. Expiry
+    times are also kept in a min-heap so that every `set()` frees a few
+    expired values even if they are never read again. `purge_expired()` frees
+    all of them at once. `memory_used` is the estimated size of the values.
+    """
+
+    # - the number of expired values freed by each `set()`, more than one so
+    # that the sweep always outpaces the rate at which values are added.
+    sweep_batch = 2
 
     def __init__(self, config=None):
         super(DictCache, self).__init__(config)
         self._data = None
+        self._policy = None
+        self._expiries = []
+        self._counter = itertools.count()
+        # - the size of each value, and their total, with `max_bytes`
+        self._sizes = None
+        self._bytes = 0
+
+    @property
+    def max_entries(self):
+        return self.config.get('max_entries')
+
+    @property
+    def max_bytes(self):
+        return self.config.get('max_bytes')
 
     @property
     def data(self):
         if self._data is None:
-            self._data = defaultdict(lambda: ('', 0)) \
-                if self.config.get('max_age') else defaultdict(str)
+            self._data = {}
+            if self.max_bytes:
+                self._sizes = {}
+            if self.max_entries or self.max_bytes:
+                self._policy = make_policy(self.config.get(
+                    'eviction_policy', 'gds' if self.max_bytes else 'lru'))
         return self._data
 
-    def get(self, key):
-        if self.config.get('max_age'):
-            value, expiry_time = self.data[key]
-            if time.time() > expiry_time:
-                self.delete(key)
-                raise KeyError(key)
-        else:
-            value = self.data[key]
+    @property
+    def memory_used(self):
+        """The estimated size of the values held, in bytes, as measured by
+        the `sizer`.
+        """
+        data = self.data
+        if self._sizes is not None:
+            return self._bytes
+        sizer = self.config.get('sizer', serialized_size)
+        return sum(sizer(value) for value, _ in data.values())
+
+    def get(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is None:
+            return default
+
+        value, expiry_time = entry
+        if expiry_time != _NEVER and time.time() > expiry_time:
+            self.delete(key)
+            return default
+        if self._policy is not None:
+            self._policy.touch(key)
         return value
 
-    def set(self, key, value):
+    def get_many(self, keys):
+        data = self.data
+        policy = self._policy
+        now = time.time()
+        values = {}
+        for key in keys:
+            entry = data.get(key)
+            if entry is None:
+                continue
+            value, expiry_time = entry
+            if now > expiry_time:
+                self.delete(key)
+                continue
+            if policy is not None:
+                policy.touch(key)
+            values[key] = value
+        return values
+
+    def set(self, key, value, ttl=None):
+        data = self.data
         max_age = self.config.get('max_age')
-        if max_age:
-            _, expiry_time = self.data[key]
-            if expiry_time == 0:
-                # ie: if we got the default value
-                expiry_time = time.time() + max_age
-            self.data[key] = (value, expiry_time)
+        if ttl:
+            expiry_time = time.time() + ttl
+        elif not max_age:
+            expiry_time = _NEVER
+        elif key in data:
+            _, expiry_time = data[key]
         else:
-            self.data[key] = value
+            expiry_time = time.time() + max_age
+        self._store(key, value, expiry_time)
+
+    def _store(self, key, value, expiry_time):
+        data = self.data
+        exists = key in data
+        if expiry_time != _NEVER:
+            if not exists or data[key][1] != expiry_time:
+                # - also when overwriting a key, so that the out of date
+                # entries of overwritten keys are dropped too
+                self._sweep(self.sweep_batch)
+                exists = key in data
+                heapq.heappush(self._expiries,
+                               (expiry_time, next(self._counter), key))
+
+        policy = self._policy
+        if policy is not None:
+            sizes = self._sizes
+            if sizes is not None:
+                size = self.config.get('sizer', serialized_size)(value)
+                if exists:
+                    # - the key keeps its frequency, with its new size
+                    self._bytes -= sizes.pop(key)
+                if size > self.max_bytes:
+                    if exists:
+                        self.delete(key)
+                    return
+                while self._bytes + size > self.max_bytes:
+                    victim = policy.victim()
+                    self.delete(victim)
+                    if victim == key:
+                        exists = False
+
+            if exists:
+                if sizes is not None and policy.size_aware:
+                    policy.touch(key, size)
+                else:
+                    policy.touch(key)
+            else:
+                # - make room before adding the key, so that a new key is
+                # never its own victim
+                max_entries = self.max_entries
+                while max_entries and len(data) >= max_entries:
+                    self.delete(policy.victim())
+                if sizes is not None and policy.size_aware:
+                    policy.add(key, size)
+                else:
+                    policy.add(key)
+            if sizes is not None:
+                sizes[key] = size
+                self._bytes += size
+
+        data[key] = (value, expiry_time)
+
+    def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl)
+
+    def delete_many(self, keys):
+        data = self.data
+        for key in keys:
+            if key in data:
+                self.delete(key)
+
+    def purge_expired(self):
+        """Frees all the expired values."""
+        self._sweep()
+
+    def _sweep(self, limit=None):
+        expiries = self._expiries
+        data = self.data
+        now = time.time()
+        while expiries and expiries[0][0] < now and limit != 0:
+            expiry_time, _, key = heapq.heappop(expiries)
+            # - skip the entries for keys that were deleted (and perhaps
+            # set again) since
+            if key in data and data[key][1] == expiry_time:
+                self.delete(key)
+                if limit is not None:
+                    limit -= 1
+
+        if len(expiries) > 2 * len(data) + 64:
+            # - too many entries were for keys that are gone, rebuild
+            self._expiries = [entry for entry in expiries
+                              if entry[2] in data and
+                              data[entry[2]][1] == entry[0]]
+            heapq.heapify(self._expiries)
 
     def delete(self, key):
         del(self.data[key])
+        if self._policy is not None:
+            self._policy.discard(key)
+            if self._sizes is not None:
+                self._bytes -= self._sizes.pop(key, 0)
 
     def clear(self):
+        if self._policy is not None:
+            self._policy.clear()
+        if self._sizes is not None:
+            self._sizes.clear()
+            self._bytes = 0
+        del self._expiries[:]
         return self.data.clear()
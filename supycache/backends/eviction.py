@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Eviction policies for the bounded in-process backends.
+
+A policy only tracks keys, the backend owns the values. The backend calls
+`add()` when a new key is stored, `touch()` when an existing key is read or
+overwritten, `discard()` when a key is removed and `victim()` to pick the key
+to evict when it is over capacity. All operations are O(1), but for those of
+the size-aware `GreedyDualSizePolicy`, which are O(log n).
+
+Policies with `size_aware = True` are passed the (estimated) size of each
+value, in bytes, as `add(key, size)`, and of the new value of a key that is
+overwritten, as `touch(key, size)`.
+"""
+import heapq
+import itertools
+from collections import OrderedDict
+
+
+class EvictionPolicy(object):  # pragma: no cover
+
+    size_aware = False
+
+    def add(self, key):
+        raise NotImplementedError()
+
+    def touch(self, key):
+        raise NotImplementedError()
+
+    def discard(self, key):
+        raise NotImplementedError()
+
+    def victim(self):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+
+class FIFOPolicy(EvictionPolicy):
+    """Evicts the key that was stored first, regardless of how it is used."""
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        self._keys[key] = None
+
+    def touch(self, key):
+        pass
+
+    def discard(self, key):
+        self._keys.pop(key, None)
+
+    def victim(self):
+        return next(iter(self._keys))
+
+    def clear(self):
+        self._keys.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class LRUPolicy(FIFOPolicy):
+    """Evicts the key that was least recently read or written."""
+
+    def touch(self, key):
+        self._keys.move_to_end(key)
+
+
+class _FrequencyNode(object):
+    """A node in the list of frequencies, holds the keys with `frequency`
+    accesses, in the order they reached it.
+    """
+    __slots__ = ('frequency', 'keys', 'prev', 'next')
+
+    def __init__(self, frequency, prev=None, next=None):
+        self.frequency = frequency
+        self.keys = OrderedDict()
+        self.prev = prev
+        self.next = next
+
+
+class LFUPolicy(EvictionPolicy):
+    """Evicts the key that was least frequently read or written, ties are
+    broken by evicting the least recently used of those keys.
+
+    Keys are kept in a doubly-linked list of frequency nodes, in increasing
+    order of frequency, so that every operation is O(1).
+    """
+
+    def __init__(self):
+        self._head = _FrequencyNode(0)
+        self._head.prev = self._head.next = self._head
+        self._nodes = {}
+
+    def _insert_after(self, node, frequency):
+        new = _FrequencyNode(frequency, prev=node, next=node.next)
+        node.next.prev = new
+        node.next = new
+        return new
+
+    def _unlink(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def add(self, key):
+        node = self._head.next
+        if node.frequency != 1:
+            node = self._insert_after(self._head, 1)
+        node.keys[key] = None
+        self._nodes[key] = node
+
+    def touch(self, key):
+        node = self._nodes[key]
+        frequency = node.frequency + 1
+        target = node.next
+        if target.frequency != frequency:
+            target = self._insert_after(node, frequency)
+        del node.keys[key]
+        target.keys[key] = None
+        self._nodes[key] = target
+        if not node.keys:
+            self._unlink(node)
+
+    def discard(self, key):
+        node = self._nodes.pop(key, None)
+        if node is not None:
+            del node.keys[key]
+            if not node.keys:
+                self._unlink(node)
+
+    def victim(self):
+        return next(iter(self._head.next.keys))
+
+    def clear(self):
+        self._head.prev = self._head.next = self._head
+        self._nodes.clear()
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class GreedyDualSizePolicy(EvictionPolicy):
+    """Evicts the key with the lowest priority, `frequency / size` plus an
+    inflation value that is raised to the priority of every evicted key, so
+    that keys not used for a while age out (the GreedyDual-Size-Frequency
+    algorithm). Large values that are rarely used are thus evicted before
+    many small ones that are used often.
+
+    Priorities are kept in a min-heap, updated lazily: a key's previous
+    entries are skipped once it has a new priority.
+    """
+
+    size_aware = True
+
+    def __init__(self):
+        # - key: [the counter of its latest heap entry, frequency, size]
+        self._entries = {}
+        self._heap = []
+        self._inflation = 0.0
+        self._counter = itertools.count()
+
+    def _push(self, key, entry):
+        entry[0] = next(self._counter)
+        heapq.heappush(self._heap, (self._inflation + entry[1] /
+                                    float(entry[2]), entry[0], key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # - too many entries are out of date, rebuild
+            self._heap = [item for item in self._heap
+                          if item[2] in self._entries and
+                          self._entries[item[2]][0] == item[1]]
+            heapq.heapify(self._heap)
+
+    def add(self, key, size=1):
+        entry = self._entries[key] = [None, 1, max(size, 1)]
+        self._push(key, entry)
+
+    def touch(self, key, size=None):
+        entry = self._entries[key]
+        entry[1] += 1
+        if size is not None:
+            entry[2] = max(size, 1)
+        self._push(key, entry)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def victim(self):
+        heap, entries = self._heap, self._entries
+        while True:
+            priority, counter, key = heap[0]
+            entry = entries.get(key)
+            if entry is not None and entry[0] == counter:
+                self._inflation = priority
+                return key
+            heapq.heappop(heap)
+
+    def clear(self):
+        self._entries.clear()
+        del self._heap[:]
+        self._inflation = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+policies = {'fifo': FIFOPolicy,
+            'gds': GreedyDualSizePolicy,
+            'lfu': LFUPolicy,
+            'lru': LRUPolicy,
+            }
+
+
+def make_policy(policy):
+    """Returns an `EvictionPolicy` instance for `policy`, which may either be
+    the name of one of the known `policies` or an `EvictionPolicy` subclass.
+    """
+    if isinstance(policy, type) and issubclass(policy, EvictionPolicy):
+        return policy()
+
+    try:
+        return policies[policy.lower()]()
+    except (AttributeError, KeyError):
+        raise ValueError('unknown eviction policy %r, expecting one of %s' %
+                         (policy, ', '.join(sorted(policies))))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import binascii
+import os
+import threading
+import weakref
+from .base import BaseCache
+from .dict_cache import DictCache
+
+
+class _WeakIdMap(object):
+    """Maps objects, by identity, to values that are dropped once the objects
+    are garbage collected. The objects need not be hashable, but must be
+    weakly referenceable.
+    """
+
+    def __init__(self):
+        # - id(obj): (weak reference to obj, value)
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, obj):
+        item = self._items.get(id(obj))
+        if item is not None and item[0]() is obj:
+            return item[1]
+        return None
+
+    def setdefault(self, obj, factory):
+        """Returns the value of `obj`, set to `factory()` if it has none."""
+        value = self.get(obj)
+        if value is not None:
+            return value
+        ident = id(obj)
+        items = self._items
+
+        def forget(ref):
+            with self._lock:
+                if items.get(ident, (None,))[0] is ref:
+                    del items[ident]
+        try:
+            ref = weakref.ref(obj, forget)
+        except TypeError:
+            raise TypeError('per instance caching requires %s instances to '
+                            'be weakly referenceable' % type(obj).__name__)
+        with self._lock:
+            item = items.get(ident)
+            if item is None or item[0]() is not obj:
+                item = items[ident] = (ref, factory())
+        return item[1]
+
+    def pop(self, obj):
+        with self._lock:
+            item = self._items.get(id(obj))
+            if item is not None and item[0]() is obj:
+                del self._items[id(obj)]
+                return item[1]
+        return None
+
+    def values(self):
+        return [value for _, value in list(self._items.values())]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class InstanceKey(str):
+    """A cache key along with the `store` (the `DictCache` of an instance in
+    an `InstanceCache`) that the value cached under it belongs to.
+
+    Keys of different instances are not equal, even with the same text, so
+    that concurrent calls of a method on different instances are not merged
+    (by `single_flight`, for instance).
+    """
+
+    def __new__(cls, key, store):
+        self = super(InstanceKey, cls).__new__(cls, key)
+        self.store = store
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, InstanceKey) and \
+            self.store is other.store and str.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.store), str.__hash__(self)))
+
+
+class InstanceCache(BaseCache):
+    """Caches the results of the methods of each instance in a `DictCache` of
+    its own, in-process, which is dropped once the instance is garbage
+    collected. The instances are only weakly referenced, so caching does not
+    keep them alive, and must be weakly referenceable.
+
+    The keys of each instance are `InstanceKey`s, built by the decorators
+    with `per_instance=True`. Other keys are cached in a `DictCache` shared by
+    all instances. All of the `DictCache`s use the `config` of the
+    `InstanceCache` (so that, for instance, `max_entries` is the maximum per
+    instance).
+    """
+
+    def __init__(self, config=None):
+        super(InstanceCache, self).__init__(config)
+        self._stores = _WeakIdMap()
+        self._shared = DictCache(self.config)
+
+    def store(self, instance):
+        """Returns the `DictCache` of `instance`, creating it if needed."""
+        return self._stores.setdefault(instance,
+                                       lambda: DictCache(self.config))
+
+    def forget(self, instance):
+        """Drops all the values cached for `instance`."""
+        self._stores.pop(instance)
+
+    def _store(self, key):
+        return key.store if isinstance(key, InstanceKey) else self._shared
+
+    def get(self, key, default=None):
+        return self._store(key).get(str(key), default)
+
+    def set(self, key, value, ttl=None):
+        # - a plain key, so that the store does not reference itself
+        self._store(key).set(str(key), value, ttl)
+
+    def delete(self, key):
+        store, key = self._store(key), str(key)
+        if key in store.data:
+            store.delete(key)
+
+    def clear(self):
+        self._stores.clear()
+        self._shared.clear()
+
+    @property
+    def memory_used(self):
+        """The estimated size of the values held, in bytes."""
+        return sum(store.memory_used for store in self._stores.values()) + \
+            self._shared.memory_used
+
+    def __len__(self):
+        """The number of instances with values cached."""
+        return len(self._stores)
+
+
+_tokens = _WeakIdMap()
+
+
+def instance_token(instance):
+    """Returns a random prefix for the keys of `instance` in a shared
+    backend, the same for as long as the instance lives.
+    """
+    return _tokens.setdefault(
+        instance,
+        lambda: binascii.hexlify(os.urandom(8)).decode('ascii') + ':')
+
+
+def instance_key_builder(build_key, backend):
+    """Returns a function building the key for a call of a method from the
+    arguments that follow the instance, with `build_key`, scoped to the
+    instance: an `InstanceKey` if `backend` is an `InstanceCache`, otherwise
+    the key prefixed with the `instance_token()` of the instance.
+    """
+    if isinstance(backend, InstanceCache):
+        store = backend.store
+
+        def build_instance_key(instance, *args, **kwargs):
+            return InstanceKey(build_key(*args, **kwargs), store(instance))
+    else:
+        def build_instance_key(instance, *args, **kwargs):
+            return instance_token(instance) + build_key(*args, **kwargs)
+    return build_instance_key
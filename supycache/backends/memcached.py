@@ -1,9 +1,164 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import math
+import re
+import time
 import pylibmc
 from .base import BaseCache
+from .registry import url_options
+from .pool import BoundedPool, ThreadMappedPool
+from .serializers import Serializer
 
+# - a memcached flag that pylibmc does not use itself, marking the values
+# serialized by a `supycache.backends.serializers.Serializer`
+SERIALIZER_FLAG = 1 << 8
 
-class MemcachedCache(pylibmc.Client, BaseCache):
+MAX_KEY_LENGTH = 250
+# - memcached reads expiry times longer than 30 days as unix timestamps
+MAX_RELATIVE_EXPIRY = 30 * 24 * 3600
+# - the characters memcached does not allow in keys
+_unsafe = re.compile(r'[\x00-\x20\x7f]')
 
-    clear = pylibmc.Client.flush_all
+
+class _Client(pylibmc.Client):
+    """A `pylibmc.Client` that (optionally) serializes values with a
+    `supycache.backends.serializers.Serializer`. Values stored without the
+    serializer can still be read once it is in use, and values stored with
+    one can be read without it (by a default `Serializer`).
+    """
+
+    serializer = None
+    # - decodes the serialized values when no `serializer` is set
+    _default_serializer = Serializer()
+
+    def serialize(self, value):
+        if self.serializer is None:
+            return super(_Client, self).serialize(value)
+        return self.serializer.dumps(value), SERIALIZER_FLAG
+
+    def deserialize(self, data, flags):
+        if flags & SERIALIZER_FLAG:
+            return (self.serializer or self._default_serializer).loads(data)
+        return super(_Client, self).deserialize(data, flags)
+
+
+def _expiry(ttl):
+    if not ttl:
+        return 0
+    if ttl > MAX_RELATIVE_EXPIRY:
+        return int(math.ceil(time.time() + ttl))
+    return int(math.ceil(ttl))
+
+
+class MemcachedCache(BaseCache):
+    """A memcached backend, safe to share between threads.
+
+    `servers` and `client_kwargs` are passed on to `pylibmc.Client`. Since a
+    client must not be used by more than one thread at a time, every call
+    checks a client out of a pool:
+
+    - by default, a pool of at most `pool_size` clients shared by all threads,
+        waiting up to `pool_timeout` seconds for a client to be free before
+        raising `supycache.backends.pool.PoolTimeout`.
+
+    - with `thread_mapped=True`, one client for each thread.
+
+    A `serializer` (a `supycache.backends.serializers.Serializer`) may be
+    given to serialize and compress values with, instead of the pylibmc
+    default pickling.
+
+    The `max_age` in the `config` is the number of seconds after which a
+    cached value expires, unless a `ttl` is passed to `set()`.
+
+    The decorators replace the keys memcached does not accept (see
+    `key_allowed()`) with a digest.
+    """
+
+    def __init__(self, servers, pool_size=8, pool_timeout=1.0,
+                 thread_mapped=False, serializer=None, config=None,
+                 **client_kwargs):
+        super(MemcachedCache, self).__init__(config)
+        self.servers = servers
+        self.serializer = serializer
+        self._client_kwargs = client_kwargs
+        self.pool = ThreadMappedPool(self._new_client) if thread_mapped \
+            else BoundedPool(self._new_client, pool_size, pool_timeout)
+
+    @classmethod
+    def from_url(cls, url):
+        """`memcached://host1:11211,host2:11211?pool=8&pool_timeout=1.0`,
+        with `thread_mapped=true` for a client per thread, and the other
+        parameters as the `config`.
+        """
+        config = url_options(url)
+        options = dict((name, config.pop(name)) for name in
+                       ('pool_timeout', 'thread_mapped') if name in config)
+        return cls(url.netloc.split(','), config.pop('pool', 8),
+                   config=config, **options)
+
+    def _new_client(self):
+        client = _Client(self.servers, **self._client_kwargs)
+        client.serializer = self.serializer
+        return client
+
+    restricts_keys = True
+
+    def key_allowed(self, key):
+        """Keys must be at most 250 bytes long, without any whitespace or
+        control characters.
+        """
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        return len(key) <= MAX_KEY_LENGTH and \
+            _unsafe.search(key.decode('latin-1')) is None
+
+    def get(self, key, default=None):
+        client = self.pool.acquire()
+        try:
+            return client.get(key, default)
+        finally:
+            self.pool.release(client)
+
+    def set(self, key, value, ttl=None):
+        client = self.pool.acquire()
+        try:
+            return client.set(key, value, time=_expiry(
+                ttl or self.config.get('max_age')))
+        finally:
+            self.pool.release(client)
+
+    def delete(self, key):
+        client = self.pool.acquire()
+        try:
+            return client.delete(key)
+        finally:
+            self.pool.release(client)
+
+    def clear(self):
+        client = self.pool.acquire()
+        try:
+            return client.flush_all()
+        finally:
+            self.pool.release(client)
+
+    def get_many(self, keys):
+        client = self.pool.acquire()
+        try:
+            return client.get_multi(keys)
+        finally:
+            self.pool.release(client)
+
+    def set_many(self, mapping, ttl=None):
+        client = self.pool.acquire()
+        try:
+            return client.set_multi(mapping, time=_expiry(
+                ttl or self.config.get('max_age')))
+        finally:
+            self.pool.release(client)
+
+    def delete_many(self, keys):
+        client = self.pool.acquire()
+        try:
+            return client.delete_multi(keys)
+        finally:
+            self.pool.release(client)
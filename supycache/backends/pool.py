@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Pools of clients, for the backends whose clients are not thread-safe.
+
+A pool creates clients with `factory()` as they are needed. A client is
+taken from the pool with `acquire()` and must be given back with `release()`
+once done with.
+"""
+import threading
+
+import queue
+
+
+class PoolTimeout(Exception):
+    """Raised when no client is available within the checkout timeout."""
+
+
+class BoundedPool(object):
+    """Holds at most `size` clients, shared by all threads. When they are all
+    in use, `acquire()` waits up to `timeout` seconds (forever if `None`) for
+    one to be released before raising `PoolTimeout`.
+    """
+
+    def __init__(self, factory, size=8, timeout=1.0):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        # - LIFO so that the most recently used (and connected) clients are
+        # reused first
+        self._clients = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._clients.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.factory()
+            except:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._clients.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout('no client available after %s seconds' %
+                              self.timeout)
+
+    def release(self, client):
+        self._clients.put(client)
+
+
+class ThreadMappedPool(object):
+    """Holds one client per thread, created the first time the thread
+    acquires one and dropped when the thread exits.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def acquire(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.factory()
+        return client
+
+    def release(self, client):
+        pass
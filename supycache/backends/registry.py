@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""The registry of the backends that can be configured with a URL.
+
+A URL names the backend with its scheme, and configures it with the rest of
+the URL, for instance::
+
+    memory://?max_entries=100000&max_age=60
+    sharded://?shards=32&max_entries=100000
+    sqlite:///var/cache/myapp/cache.sqlite?max_entries=100000
+    shm://?buckets=16384&slot_size=2048
+    memcached://10.0.0.1:11211,10.0.0.2:11211?pool=8&max_age=300
+
+The query parameters are converted to `int`, `float` or `bool` when they look
+like one, and passed to the `from_url()` class method of the backend (see
+`supycache.backends.base.BaseCache.from_url`).
+
+The modules of the backends are only imported once a URL uses them. Other
+backends are registered with `register_backend()`, or by installed packages
+with an entry point in the `supycache.backends` group, named after the
+scheme::
+
+    entry_points={'supycache.backends': ['redis = mypackage.cache:RedisCache']}
+"""
+import importlib
+import threading
+
+ENTRY_POINT_GROUP = 'supycache.backends'
+
+# - the backends of each scheme, as 'module:attribute' until first used
+_backends = {
+    'memory': 'supycache.backends.dict_cache:DictCache',
+    'sharded': 'supycache.backends.sharded:ShardedDictCache',
+    'sqlite': 'supycache.backends.sqlite:SQLiteCache',
+    'shm': 'supycache.backends.shared_memory:SharedMemoryCache',
+    'memcached': 'supycache.backends.memcached:MemcachedCache',
+}
+_lock = threading.Lock()
+
+
+def _load(path):
+    module, _, attribute = path.partition(':')
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _entry_point(scheme):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # pragma: no cover - python < 3.8
+        return None
+    found = entry_points()
+    if hasattr(found, 'select'):
+        found = found.select(group=ENTRY_POINT_GROUP, name=scheme)
+    else:  # pragma: no cover - python < 3.10
+        found = [entry_point for entry_point
+                 in found.get(ENTRY_POINT_GROUP, ())
+                 if entry_point.name == scheme]
+    for entry_point in found:
+        return entry_point.load()
+    return None
+
+
+def register_backend(scheme, backend):
+    """Registers `backend` for the URLs with `scheme`. The `backend` is
+    either a class (or any callable) with a `from_url()` method, or its
+    'module:attribute' path, imported when a URL first uses it.
+    """
+    with _lock:
+        _backends[scheme] = backend
+
+
+def backend_class(scheme):
+    """Returns the backend registered for `scheme`, importing it if needed,
+    or raises a `ValueError` if there is none.
+    """
+    with _lock:
+        backend = _backends.get(scheme)
+    if backend is None:
+        backend = _entry_point(scheme)
+        if backend is None:
+            raise ValueError('no backend is registered for %s://' % scheme)
+    elif isinstance(backend, str):
+        backend = _load(backend)
+    with _lock:
+        _backends[scheme] = backend
+    return backend
+
+
+def _convert(value):
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return {'true': True, 'false': False}.get(value.lower(), value)
+
+
+def url_options(url):
+    """Returns the query parameters of `url` (a `urlsplit()` result) as a
+    dict, with the values that look like numbers or booleans converted.
+    """
+    from urllib.parse import parse_qsl
+    return dict((name, _convert(value))
+                for name, value in parse_qsl(url.query))
+
+
+def from_url(url):
+    """Returns the backend configured by `url`."""
+    # - urllib is only imported when URLs are used
+    from urllib.parse import urlsplit
+    parsed = urlsplit(url)
+    if not parsed.scheme:
+        raise ValueError('%r is not a backend URL' % url)
+    return backend_class(parsed.scheme).from_url(parsed)
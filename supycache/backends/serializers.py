@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Serialization and compression of values for the out-of-process backends.
+
+Every serialized value starts with a header byte naming the codec used to
+compress it, so values written with different codecs (or none) can be read by
+any `Serializer`, for instance while rolling out a change of codec.
+"""
+import pickle
+import zlib
+
+
+class Codec(object):
+    """A compression codec, identified in the header byte by `id`."""
+
+    def __init__(self, name, id, compress, decompress):
+        self.name = name
+        self.id = id
+        self.compress = compress
+        self.decompress = decompress
+
+
+codecs = {}
+_decompressors = {}
+
+
+def register_codec(codec):
+    """Makes `codec` available to `Serializer` by name and by header id."""
+    if not 0 < codec.id < 256:
+        raise ValueError('codec ids must be between 1 and 255')
+    for registered in codecs.values():
+        if registered.id == codec.id and registered.name != codec.name:
+            raise ValueError('codec id %d is used by %s' %
+                             (codec.id, registered.name))
+    codecs[codec.name] = codec
+    _decompressors[codec.id] = codec.decompress
+
+
+register_codec(Codec('zlib', 1, zlib.compress, zlib.decompress))
+
+try:
+    import lzma
+    register_codec(Codec('lzma', 2, lzma.compress, lzma.decompress))
+except ImportError:  # pragma: no cover
+    pass
+
+try:
+    import lz4.frame
+    register_codec(Codec('lz4', 3, lz4.frame.compress, lz4.frame.decompress))
+except ImportError:  # pragma: no cover
+    pass
+
+try:
+    import zstandard
+    register_codec(Codec('zstd', 4, zstandard.ZstdCompressor().compress,
+                         zstandard.ZstdDecompressor().decompress))
+except ImportError:  # pragma: no cover
+    pass
+
+_UNCOMPRESSED = 0
+
+
+class Serializer(object):
+    """Pickles values and compresses the ones larger than a threshold.
+
+    - `protocol` : The pickle protocol, by default 5 (or the highest one
+        available, if lower).
+
+    - `compress_threshold` : The size in bytes of pickled values above which
+        they are compressed. Values are not compressed if this is `None`, nor
+        when compressing does not make them smaller.
+
+    - `codec` : The name of the codec values are compressed with, 'zlib' by
+        default, or any other one in `codecs`.
+    """
+
+    def __init__(self, protocol=None, compress_threshold=None, codec='zlib'):
+        self.protocol = min(5, pickle.HIGHEST_PROTOCOL) \
+            if protocol is None else protocol
+        self.compress_threshold = compress_threshold
+        try:
+            self.codec = codecs[codec]
+        except KeyError:
+            raise ValueError('unknown codec %r, expecting one of %s' %
+                             (codec, ', '.join(sorted(codecs))))
+
+    def dumps(self, value):
+        data = pickle.dumps(value, self.protocol)
+        if self.compress_threshold is not None and \
+                len(data) > self.compress_threshold:
+            compressed = self.codec.compress(data)
+            if len(compressed) < len(data):
+                return bytes((self.codec.id,)) + compressed
+        return bytes((_UNCOMPRESSED,)) + data
+
+    def loads(self, data):
+        data = memoryview(data)
+        header = data[0]
+        if header != _UNCOMPRESSED:
+            try:
+                decompress = _decompressors[header]
+            except KeyError:
+                raise ValueError('value compressed with an unknown codec '
+                                 '(header %d)' % header)
+            return pickle.loads(decompress(data[1:]))
+        return pickle.loads(data[1:])
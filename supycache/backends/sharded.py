@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+from .base import BaseCache
+from .dict_cache import DictCache
+from .registry import url_options
+
+
+class _Shard(DictCache):
+
+    def __init__(self, config, shards):
+        super(_Shard, self).__init__(config)
+        self._shards = shards
+
+    @property
+    def max_entries(self):
+        max_entries = self.config.get('max_entries')
+        return max_entries and max(1, -(-max_entries // self._shards))
+
+    @property
+    def max_bytes(self):
+        max_bytes = self.config.get('max_bytes')
+        return max_bytes and max(1, max_bytes // self._shards)
+
+
+class ShardedDictCache(BaseCache):
+    """A thread-safe in-process cache backend.
+
+    Keys are spread across `shards` `DictCache` instances, each guarded by its
+    own lock, so that threads only contend when they use keys on the same
+    shard. Accepts the same `config` as `DictCache`, where `max_entries` and
+    `max_bytes` are the totals across all the shards. Each shard holds at
+    most its share of `max_bytes`, `max_bytes // shards`, so values larger
+    than that are not cached.
+    """
+
+    def __init__(self, config=None, shards=16):
+        super(ShardedDictCache, self).__init__(config)
+        max_bytes = self.config.get('max_bytes')
+        if max_bytes and max_bytes < shards:
+            raise ValueError('max_bytes must be at least the number of '
+                             'shards (%d)' % shards)
+        # - changes to `config` (for instance, by the decorators) are seen by
+        # all the shards
+        self._shards = [_Shard(self.config, shards) for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._count = shards
+
+    @classmethod
+    def from_url(cls, url):
+        """`sharded://?shards=16&max_entries=...`"""
+        config = url_options(url)
+        return cls(config, shards=config.pop('shards', 16))
+
+    def get(self, key, default=None):
+        index = hash(key) % self._count
+        with self._locks[index]:
+            return self._shards[index].get(key, default)
+
+    def set(self, key, value, ttl=None):
+        index = hash(key) % self._count
+        with self._locks[index]:
+            return self._shards[index].set(key, value, ttl)
+
+    def delete(self, key):
+        index = hash(key) % self._count
+        with self._locks[index]:
+            return self._shards[index].delete(key)
+
+    def _by_shard(self, keys):
+        shards = {}
+        for key in keys:
+            shards.setdefault(hash(key) % self._count, []).append(key)
+        return shards.items()
+
+    def get_many(self, keys):
+        values = {}
+        for index, shard_keys in self._by_shard(keys):
+            with self._locks[index]:
+                values.update(self._shards[index].get_many(shard_keys))
+        return values
+
+    def set_many(self, mapping, ttl=None):
+        for index, shard_keys in self._by_shard(mapping):
+            with self._locks[index]:
+                self._shards[index].set_many(
+                    dict((key, mapping[key]) for key in shard_keys), ttl)
+
+    def delete_many(self, keys):
+        for index, shard_keys in self._by_shard(keys):
+            with self._locks[index]:
+                self._shards[index].delete_many(shard_keys)
+
+    def clear(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def purge_expired(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.purge_expired()
+
+    @property
+    def memory_used(self):
+        """The estimated size of the values held, in bytes."""
+        used = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                used += shard.memory_used
+        return used
+
+    def __len__(self):
+        return sum(len(shard.data) for shard in self._shards)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import multiprocessing
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+from .base import BaseCache
+from .registry import url_options
+from .serializers import Serializer
+
+_MAGIC = b'SUPYSHM1'
+# - magic, number of buckets, ways (slots per bucket), slot size
+_HEADER = struct.Struct('<8sIII')
+_HEADER_SIZE = 64
+
+# - seq, key hash, expiry time, write time, value length, key length, used
+_SLOT = struct.Struct('<IIddIHH')
+_SEQ = struct.Struct('<I')
+
+# - the number of times a read is retried while the slot is being written,
+# before waiting for the writer's lock instead
+_READ_RETRIES = 16
+
+_NOT_FOUND = object()
+
+
+def _encode(key):
+    if isinstance(key, bytes):
+        return key
+    return key.encode('utf-8')
+
+
+def _attach(name):
+    """Attaches to the existing shared memory block `name` without having
+    the resource tracker of this process unlink it when the process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # pragma: no cover - python < 3.13
+        from multiprocessing import resource_tracker
+        block = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
+
+class SharedMemoryCache(BaseCache):
+    """A cache backend in a block of shared memory, shared by all the
+    processes forked (or spawned with it as an argument) after it is created,
+    for instance the workers of a pre-fork server.
+
+    The block holds a fixed-size hash table of `buckets` buckets of `ways`
+    slots of `slot_size` bytes each. A key is stored in one of the slots of
+    its bucket; when they are all taken the expired value, if any, or the
+    value written least recently in the bucket is evicted. Values are
+    serialized with `serializer` (a
+    `supycache.backends.serializers.Serializer`) and those that do not fit in
+    a slot, along with their key, are rejected with a `ValueError`.
+
+    Writes to a bucket are serialized by one of `locks` process-shared locks,
+    created with the multiprocessing `context` (by default, that of the
+    default start method) the processes must be started with. Reads do not
+    lock: each slot has a sequence number that writers make odd while they
+    write and reads are retried if it changed while they copied the value out
+    of the slot.
+
+    Recognized `config` options:
+
+    - `max_age` : The number of seconds after which a cached value expires,
+        unless a `ttl` is passed to `set()`.
+
+    The process that creates the cache should `unlink()` it once done.
+    """
+
+    def __init__(self, buckets=4096, ways=4, slot_size=1024, locks=64,
+                 serializer=None, config=None, name=None, context=None):
+        super(SharedMemoryCache, self).__init__(config)
+        if slot_size <= _SLOT.size:
+            raise ValueError('slot_size must be larger than %d' % _SLOT.size)
+        self.buckets = buckets
+        self.ways = ways
+        self.slot_size = slot_size
+        self.serializer = serializer if serializer is not None \
+            else Serializer()
+        context = context if context is not None else multiprocessing
+        self._locks = [context.Lock() for _ in range(locks)]
+        self._block = shared_memory.SharedMemory(
+            name, create=True,
+            size=_HEADER_SIZE + buckets * ways * slot_size)
+        _HEADER.pack_into(self._block.buf, 0, _MAGIC, buckets, ways, slot_size)
+        self._buf = self._block.buf
+
+    @classmethod
+    def from_url(cls, url):
+        """`shm://?buckets=4096&ways=4&slot_size=1024&locks=64&max_age=...`,
+        or `shm://name?...` to name the block of shared memory.
+        """
+        config = url_options(url)
+        options = dict((name, config.pop(name)) for name in
+                       ('buckets', 'ways', 'slot_size', 'locks')
+                       if name in config)
+        return cls(config=config, name=url.netloc or None, **options)
+
+    @property
+    def name(self):
+        return self._block.name
+
+    def __getstate__(self):
+        # - the locks can only be pickled while spawning a process
+        return {'config': self.config, 'serializer': self.serializer,
+                'locks': self._locks, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.config = state['config']
+        self.serializer = state['serializer']
+        self._locks = state['locks']
+        self._block = _attach(state['name'])
+        self._buf = self._block.buf
+        magic, self.buckets, self.ways, self.slot_size = \
+            _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC:
+            raise ValueError('%s is not a SharedMemoryCache' % state['name'])
+
+    def _bucket(self, key_bytes):
+        key_hash = zlib.crc32(key_bytes) & 0xffffffff
+        bucket = key_hash % self.buckets
+        first = _HEADER_SIZE + bucket * self.ways * self.slot_size
+        return key_hash, self._locks[bucket % len(self._locks)], \
+            range(first, first + self.ways * self.slot_size, self.slot_size)
+
+    def _read(self, offset, key_bytes, key_hash, now):
+        """Returns the serialized value in the slot at `offset` if it holds
+        `key_bytes` and has not expired, `_NOT_FOUND` if not, or `None` if
+        the slot was being written.
+        """
+        buf = self._buf
+        seq, slot_hash, expiry, _, value_length, key_length, used = \
+            _SLOT.unpack_from(buf, offset)
+        if seq & 1:
+            return None
+        if not used or slot_hash != key_hash or \
+                key_length != len(key_bytes) or expiry <= now:
+            return _NOT_FOUND
+        start = offset + _SLOT.size
+        if buf[start:start + key_length] != key_bytes:
+            return _NOT_FOUND
+        start += key_length
+        data = bytes(buf[start:start + value_length])
+        if _SEQ.unpack_from(buf, offset)[0] != seq:
+            return None
+        return data
+
+    def get(self, key, default=None):
+        key_bytes = _encode(key)
+        key_hash, lock, offsets = self._bucket(key_bytes)
+        now = time.time()
+        for offset in offsets:
+            for _ in range(_READ_RETRIES):
+                data = self._read(offset, key_bytes, key_hash, now)
+                if data is not None:
+                    break
+            else:
+                with lock:
+                    data = self._read(offset, key_bytes, key_hash, now)
+            if data is not _NOT_FOUND:
+                return self.serializer.loads(data)
+        return default
+
+    def set(self, key, value, ttl=None):
+        key_bytes = _encode(key)
+        data = self.serializer.dumps(value)
+        if _SLOT.size + len(key_bytes) + len(data) > self.slot_size:
+            raise ValueError('value of %d bytes does not fit in a slot of %d '
+                             'bytes' % (len(data), self.slot_size))
+        ttl = ttl or self.config.get('max_age')
+        now = time.time()
+        expiry = now + ttl if ttl else float('inf')
+        key_hash, lock, offsets = self._bucket(key_bytes)
+        buf = self._buf
+        with lock:
+            offset = self._victim(offsets, key_bytes, key_hash, now)
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            _SEQ.pack_into(buf, offset, (seq + 1) & 0xffffffff)
+            start = offset + _SLOT.size
+            buf[start:start + len(key_bytes)] = key_bytes
+            start += len(key_bytes)
+            buf[start:start + len(data)] = data
+            _SLOT.pack_into(buf, offset, (seq + 2) & 0xffffffff, key_hash,
+                            expiry, now, len(data), len(key_bytes), 1)
+
+    def _victim(self, offsets, key_bytes, key_hash, now):
+        """Returns the offset of the slot to write `key_bytes` to: the one
+        already holding it, an empty or expired one, or the one written
+        least recently, in that order of preference.
+        """
+        buf = self._buf
+        victim, victim_rank = None, None
+        for offset in offsets:
+            _, slot_hash, expiry, written, _, key_length, used = \
+                _SLOT.unpack_from(buf, offset)
+            if not used:
+                rank = (0, 0)
+            elif slot_hash == key_hash and key_length == len(key_bytes) and \
+                    buf[offset + _SLOT.size:
+                        offset + _SLOT.size + key_length] == key_bytes:
+                return offset
+            elif expiry <= now:
+                rank = (1, expiry)
+            else:
+                rank = (2, written)
+            if victim_rank is None or rank < victim_rank:
+                victim, victim_rank = offset, rank
+        return victim
+
+    def _free(self, offset):
+        seq = _SEQ.unpack_from(self._buf, offset)[0]
+        _SLOT.pack_into(self._buf, offset, (seq + 2) & 0xffffffff,
+                        0, 0.0, 0.0, 0, 0, 0)
+
+    def delete(self, key):
+        key_bytes = _encode(key)
+        key_hash, lock, offsets = self._bucket(key_bytes)
+        with lock:
+            for offset in offsets:
+                if self._read(offset, key_bytes, key_hash, float('-inf')) \
+                        is not _NOT_FOUND:
+                    self._free(offset)
+
+    def clear(self):
+        slots = self.ways * self.slot_size
+        for bucket in range(self.buckets):
+            first = _HEADER_SIZE + bucket * slots
+            with self._locks[bucket % len(self._locks)]:
+                for offset in range(first, first + slots, self.slot_size):
+                    self._free(offset)
+
+    def __len__(self):
+        now = time.time()
+        count = 0
+        end = _HEADER_SIZE + self.buckets * self.ways * self.slot_size
+        for offset in range(_HEADER_SIZE, end, self.slot_size):
+            _, _, expiry, _, _, _, used = _SLOT.unpack_from(self._buf, offset)
+            if used and expiry > now:
+                count += 1
+        return count
+
+    def close(self):
+        """Detaches this process from the shared memory."""
+        self._buf = None
+        self._block.close()
+
+    def unlink(self):
+        """Frees the shared memory, once all processes have closed it."""
+        self._block.unlink()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import threading
+import time
+from .base import BaseCache
+from .registry import url_options
+from .serializers import Serializer
+
+# - the maximum number of keys in one `IN (...)` query, below the default
+# SQLITE_MAX_VARIABLE_NUMBER of older sqlite versions
+_CHUNK_SIZE = 500
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY NOT NULL,
+    value BLOB NOT NULL,
+    expiry REAL
+);
+CREATE INDEX IF NOT EXISTS cache_expiry ON cache (expiry)
+    WHERE expiry IS NOT NULL;
+'''
+
+
+def _chunks(keys):
+    keys = list(keys)
+    for i in range(0, len(keys), _CHUNK_SIZE):
+        yield keys[i:i + _CHUNK_SIZE]
+
+
+class SQLiteCache(BaseCache):
+    """A cache backend stored in an SQLite database at `path`, so that the
+    cached values outlive the process and are shared by all the processes on
+    the host using the same `path`.
+
+    Recognized `config` options:
+
+    - `max_age` : The number of seconds after which a cached value expires,
+        unless a `ttl` is passed to `set()`.
+
+    - `max_entries` : The maximum number of values to hold. The values
+        written least recently are evicted, every `purge_interval` writes of
+        each process, so the database may hold a few more values in between.
+
+    Each value is a row, read with a primary key lookup and unpickled on its
+    own by the `serializer` (a `supycache.backends.serializers.Serializer`).
+    The database is in WAL mode so that readers do not block the writer, and
+    writers of other processes wait up to `timeout` seconds for one another.
+    Each thread (of each process) uses a connection of its own.
+    """
+
+    # - the number of writes between two purges of the expired and excess
+    # values, by each process
+    purge_interval = 1000
+
+    def __init__(self, path, config=None, serializer=None, timeout=5.0):
+        super(SQLiteCache, self).__init__(config)
+        self.path = path
+        self.serializer = serializer if serializer is not None \
+            else Serializer()
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self.connection.executescript(_SCHEMA)
+
+    @classmethod
+    def from_url(cls, url):
+        """`sqlite:///path/to/cache.sqlite?timeout=5&max_entries=...`, or
+        `sqlite://relative/path`.
+        """
+        config = url_options(url)
+        return cls(url.netloc + url.path, config,
+                   timeout=config.pop('timeout', 5.0))
+
+    @property
+    def connection(self):
+        """The connection of the calling thread, created on first use (and
+        after a fork, since connections must not cross processes).
+        """
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # - isolation_level=None: every statement commits on its own,
+            # unless in an explicit transaction
+            local.connection = sqlite3.connect(self.path,
+                                               timeout=self.timeout,
+                                               isolation_level=None,
+                                               check_same_thread=False)
+            local.connection.execute('PRAGMA journal_mode=WAL')
+            local.connection.execute('PRAGMA synchronous=NORMAL')
+            local.pid = os.getpid()
+        return local.connection
+
+    def _expiry(self, ttl):
+        ttl = ttl or self.config.get('max_age')
+        return time.time() + ttl if ttl else None
+
+    def _wrote(self, count=1):
+        self._writes += count
+        if self._writes >= self.purge_interval:
+            self._writes = 0
+            self.purge()
+
+    def get(self, key, default=None):
+        row = self.connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expiry IS NULL OR expiry > ?)',
+            (key, time.time())).fetchone()
+        if row is None:
+            return default
+        return self.serializer.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expiry) '
+            'VALUES (?, ?, ?)',
+            (key, self.serializer.dumps(value), self._expiry(ttl)))
+        self._wrote()
+
+    def delete(self, key):
+        self.connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    def get_many(self, keys):
+        values = {}
+        now = time.time()
+        for chunk in _chunks(keys):
+            rows = self.connection.execute(
+                'SELECT key, value FROM cache WHERE key IN (%s) '
+                'AND (expiry IS NULL OR expiry > ?)' %
+                ', '.join('?' * len(chunk)), chunk + [now])
+            for key, value in rows:
+                values[key] = self.serializer.loads(value)
+        return values
+
+    def set_many(self, mapping, ttl=None):
+        expiry = self._expiry(ttl)
+        rows = [(key, self.serializer.dumps(value), expiry)
+                for key, value in mapping.items()]
+        with self._transaction() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expiry) '
+                'VALUES (?, ?, ?)', rows)
+        self._wrote(len(rows))
+
+    def delete_many(self, keys):
+        with self._transaction() as connection:
+            for chunk in _chunks(keys):
+                connection.execute('DELETE FROM cache WHERE key IN (%s)' %
+                                   ', '.join('?' * len(chunk)), chunk)
+
+    def purge(self):
+        """Deletes the expired values, and the values written least recently
+        in excess of `max_entries`.
+        """
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM cache WHERE expiry <= ?',
+                               (time.time(),))
+            max_entries = self.config.get('max_entries')
+            if max_entries:
+                # - `INSERT OR REPLACE` gives a new rowid to the values it
+                # writes, so rowids are in the order of the last writes
+                connection.execute(
+                    'DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache '
+                    'ORDER BY rowid DESC LIMIT -1 OFFSET ?)', (max_entries,))
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+    def close(self):
+        """Closes the connection of the calling thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.pid = None
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM cache WHERE expiry IS NULL OR expiry > ?',
+            (time.time(),)).fetchone()[0]
+
+
+class _Transaction(object):
+    """Runs the statements of a `with` block in one (write) transaction."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        # - IMMEDIATE takes the write lock upfront, rather than failing to
+        # upgrade a read lock when another process writes in between
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import binascii
+import os
+from .base import BaseCache, MISS
+
+# - the prefix of the keys holding the current generation of each tag
+TAG_PREFIX = 'supycache:tag:'
+
+
+def tag_key(tag):
+    return TAG_PREFIX + tag
+
+
+def new_generation():
+    return binascii.hexlify(os.urandom(16)).decode('ascii')
+
+
+class TaggedKey(str):
+    """A cache key along with the `tags` of the value cached under it.
+
+    `generations` is set to the generations of the tags read by `get()`, so
+    that `set()`, for the same key, stores them without reading them again.
+    """
+
+    def __new__(cls, key, tags):
+        self = super(TaggedKey, cls).__new__(cls, key)
+        self.tags = tuple(tags)
+        self.generations = None
+        return self
+
+
+def _get_many(backend, keys):
+    if isinstance(backend, BaseCache):
+        return backend.get_many(keys)
+    values = {}
+    for key in keys:
+        value = backend.get(key)
+        if value is not None:
+            values[key] = value
+    return values
+
+
+def _set_many(backend, mapping):
+    if isinstance(backend, BaseCache):
+        return backend.set_many(mapping)
+    for key, value in mapping.items():
+        backend.set(key, value)
+
+
+def invalidate_tags(backend, tags):
+    """Makes every value cached in `backend` with any of `tags` a miss, by
+    moving the tags on to a new generation. The `tags` are used as they are,
+    `supycache.invalidate_tags()` prefixes them with a `key_namespace` and
+    digests them as the decorators do.
+    """
+    _set_many(backend, dict((tag_key(tag), new_generation()) for tag in tags))
+
+
+class TaggedCache(BaseCache):
+    """Caches values along with the current generations of their tags, in
+    front of another backend.
+
+    The tags of a value are those of its key, a `TaggedKey`. The generation of
+    each tag is a random token stored in the `backend` itself, under
+    `tag_key(tag)`. A value is a miss once any of its tags has moved on to a
+    new generation (see `invalidate_tags()`) or once the generation of any of
+    them is evicted, so invalidating a tag takes one write no matter how many
+    values have it. Reading a value and its tags' generations takes one
+    `get_many()` call.
+
+    Keys that are not a `TaggedKey` are passed through as they are.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def config(self):
+        return getattr(self.backend, 'config', {})
+
+    @property
+    def restricts_keys(self):
+        return getattr(self.backend, 'restricts_keys', False)
+
+    def key_allowed(self, key):
+        return not hasattr(self.backend, 'key_allowed') or \
+            self.backend.key_allowed(key)
+
+    def _generations(self, keys):
+        """Sets the `generations` of the `keys` that have none, reading them
+        from the backend and creating those that are missing.
+        """
+        tags = set(tag for key in keys if key.generations is None
+                   for tag in key.tags)
+        if not tags:
+            return
+        current = _get_many(self.backend, [tag_key(tag) for tag in tags])
+        missing = dict((tag_key(tag), new_generation()) for tag in tags
+                       if tag_key(tag) not in current)
+        if missing:
+            _set_many(self.backend, missing)
+            current.update(missing)
+        for key in keys:
+            if key.generations is None:
+                key.generations = tuple(current[tag_key(tag)]
+                                        for tag in key.tags)
+
+    def _unwrap(self, key, values):
+        """Returns the value of `key` in `values`, the result of `get_many()`
+        for the key and its tags, or `MISS`.
+        """
+        key.generations = tuple(values.get(tag_key(tag), MISS)
+                                for tag in key.tags)
+        entry = values.get(key, MISS)
+        if entry is MISS:
+            return MISS
+        value, generations = entry
+        if MISS in key.generations or generations != key.generations:
+            return MISS
+        return value
+
+    def get(self, key, default=None):
+        if not isinstance(key, TaggedKey):
+            if isinstance(self.backend, BaseCache):
+                return self.backend.get(key, default)
+            value = self.backend.get(key)
+            return default if value is None else value
+        values = _get_many(self.backend,
+                           [key] + [tag_key(tag) for tag in key.tags])
+        value = self._unwrap(key, values)
+        if MISS in key.generations:
+            key.generations = None
+        return default if value is MISS else value
+
+    def set(self, key, value, ttl=None):
+        if isinstance(key, TaggedKey):
+            self._generations([key])
+            value = (value, key.generations)
+        if ttl and isinstance(self.backend, BaseCache):
+            self.backend.set(key, value, ttl=ttl)
+        else:
+            self.backend.set(key, value)
+
+    def delete(self, key):
+        return self.backend.delete(key)
+
+    def clear(self):
+        return self.backend.clear()
+
+    def get_many(self, keys):
+        tagged = [key for key in keys if isinstance(key, TaggedKey)]
+        tags = set(tag for key in tagged for tag in key.tags)
+        values = _get_many(self.backend,
+                           list(keys) + [tag_key(tag) for tag in tags])
+        results = {}
+        for key in keys:
+            value = self._unwrap(key, values) if isinstance(key, TaggedKey) \
+                else values.get(key, MISS)
+            if value is not MISS:
+                results[key] = value
+        for key in tagged:
+            if MISS in key.generations:
+                key.generations = None
+        return results
+
+    def set_many(self, mapping, ttl=None):
+        self._generations([key for key in mapping
+                           if isinstance(key, TaggedKey)])
+        mapping = dict((key, (value, key.generations)
+                        if isinstance(key, TaggedKey) else value)
+                       for key, value in mapping.items())
+        if not isinstance(self.backend, BaseCache):
+            for key, value in mapping.items():
+                self.backend.set(key, value)
+        elif ttl:
+            self.backend.set_many(mapping, ttl=ttl)
+        else:
+            self.backend.set_many(mapping)
+
+    def delete_many(self, keys):
+        if isinstance(self.backend, BaseCache):
+            return self.backend.delete_many(keys)
+        for key in keys:
+            self.backend.delete(key)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from .base import BaseCache, MISS
+from .sharded import ShardedDictCache
+
+
+class TieredCache(BaseCache):
+    """A small, short lived in-process cache in front of another backend.
+
+    Reads are served from the in-process (L1) cache when possible and read
+    through to the `remote` (L2) backend otherwise, keeping the value in L1
+    for `l1_ttl` seconds. Writes and deletes go to both. Since other processes
+    only invalidate L2, a value deleted or changed remotely may still be read
+    from L1 for up to `l1_ttl` seconds.
+
+    The `config` is that of the `remote` backend, so that decorator options
+    apply to it.
+    """
+
+    def __init__(self, remote, l1_ttl=5, l1_max_entries=10000, local=None):
+        self.remote = remote
+        self.l1_ttl = l1_ttl
+        self.local = local if local is not None else \
+            ShardedDictCache(config={'max_entries': l1_max_entries})
+
+    @property
+    def config(self):
+        return getattr(self.remote, 'config', {})
+
+    @property
+    def restricts_keys(self):
+        return getattr(self.remote, 'restricts_keys', False) or \
+            self.local.restricts_keys
+
+    def key_allowed(self, key):
+        return self.local.key_allowed(key) and \
+            (not hasattr(self.remote, 'key_allowed') or
+             self.remote.key_allowed(key))
+
+    def _l1_ttl(self, ttl):
+        return min(ttl, self.l1_ttl) if ttl else self.l1_ttl
+
+    def get(self, key, default=None):
+        value = self.local.get(key, MISS)
+        if value is MISS:
+            value = self.remote.get(key, MISS)
+            if value is MISS:
+                return default
+            self.local.set(key, value, ttl=self.l1_ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.remote.set(key, value, ttl=ttl)
+        else:
+            self.remote.set(key, value)
+        self.local.set(key, value, ttl=self._l1_ttl(ttl))
+
+    def delete(self, key):
+        self.local.delete_many([key])
+        return self.remote.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        return self.remote.clear()
+
+    def get_many(self, keys):
+        values = self.local.get_many(keys)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            remote_values = self.remote.get_many(missing)
+            if remote_values:
+                self.local.set_many(remote_values, ttl=self.l1_ttl)
+                values.update(remote_values)
+        return values
+
+    def set_many(self, mapping, ttl=None):
+        if ttl:
+            self.remote.set_many(mapping, ttl=ttl)
+        else:
+            self.remote.set_many(mapping)
+        self.local.set_many(mapping, ttl=self._l1_ttl(ttl))
+
+    def delete_many(self, keys):
+        self.local.delete_many(keys)
+        return self.remote.delete_many(keys)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Circuit breakers, to stop calling a backend that keeps failing.
+
+A breaker is `closed` while the backend works. After `failure_threshold`
+consecutive failures (errors, or calls slower than `timeout` seconds) it
+opens, and the decorators skip the backend altogether, calling the decorated
+functions directly. After `cooldown` seconds it is `half-open`: a single
+call is let through as a probe, which closes the breaker if it succeeds, or
+opens it again for another `cooldown` if it fails.
+
+State changes are logged on the 'supycache' logger, and `breaker_states()`
+returns the state of every breaker, for alerting.
+"""
+import threading
+import time
+import weakref
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+_backend_breakers = weakref.WeakKeyDictionary()
+
+
+class CircuitBreaker(object):
+    """Counts the consecutive failures of the calls of a backend, to skip
+    calling it for `cooldown` seconds once there are `failure_threshold` of
+    them. Calls that succeed but take longer than `timeout` seconds, if set,
+    count as failures.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30, timeout=None,
+                 name=''):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        # - the time the probe of the half-open breaker was let through
+        self._probing = None
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.add(self)
+
+    def allow(self):
+        """Returns whether the backend may be called."""
+        if self.state == CLOSED:
+            return True
+        with self._lock:
+            if self.state == OPEN:
+                if time.time() < self.opened_at + self.cooldown:
+                    return False
+                self._change(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                # - a probe that never reported back (say, it was cancelled)
+                # is given up on after another cooldown
+                now = time.time()
+                if self._probing is not None and \
+                        now < self._probing + self.cooldown:
+                    return False
+                self._probing = now
+            return True
+
+    def success(self, elapsed=0):
+        """Records a call of the backend that took `elapsed` seconds."""
+        if self.timeout is not None and elapsed > self.timeout:
+            return self.failure()
+        if self.state == CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._probing = None
+                self._change(CLOSED)
+
+    def failure(self):
+        """Records a failed call of the backend."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or \
+                    self.failures >= self.failure_threshold:
+                self._probing = None
+                self.opened_at = time.time()
+                if self.state != OPEN:
+                    self.trips += 1
+                    self._change(OPEN)
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = None
+            self._change(CLOSED)
+
+    def _change(self, state):
+        if state != self.state:
+            # - logging is only imported once a breaker changes state
+            import logging
+            logger = logging.getLogger('supycache')
+            log = logger.warning if state == OPEN else logger.info
+            log('circuit breaker %s is %s (after %d failures)',
+                self.name or hex(id(self)), state, self.failures)
+            self.state = state
+
+    def info(self):
+        return {'state': self.state, 'failures': self.failures,
+                'opened_at': self.opened_at, 'trips': self.trips}
+
+
+def breaker_for(backend):
+    """Returns the circuit breaker shared by all the decorators using
+    `backend`, created with the default options on first use.
+    """
+    breaker = CircuitBreaker(name=type(backend).__name__)
+    with _registry_lock:
+        try:
+            return _backend_breakers.setdefault(backend, breaker)
+        except TypeError:
+            # - the backend cannot be weakly referenced, each decorator gets
+            # a breaker of its own
+            return breaker
+
+
+def breaker_states():
+    """Returns a dict mapping the name of every circuit breaker to its
+    `info()`. Breakers with the same name are listed as `name#2`, `name#3`...
+    """
+    with _registry_lock:
+        registered = sorted(_registry, key=lambda breaker: breaker.trips,
+                            reverse=True)
+    states = {}
+    for breaker in registered:
+        name = breaker.name or hex(id(breaker))
+        unique, count = name, 1
+        while unique in states:
+            count += 1
+            unique = '%s#%d' % (name, count)
+        states[unique] = breaker.info()
+    return states
@@ -1,60 +1,520 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import random
+import threading
+import time
+from collections.abc import Mapping
 from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter as timer
+
+from .backends.base import BaseCache, MISS
+from .backends.instance import InstanceCache, instance_key_builder
+from .backends.tagged import TaggedCache, TaggedKey, invalidate_tags, \
+    tag_key
+from .breaker import CircuitBreaker, breaker_for
+from .keys import AUTO, auto_key, bound_key, compile_key
+from .singleflight import SingleFlight
+from .stats import (CacheStats, HITS, MISSES, ERRORS, BACKEND_CALLS,
+                    BACKEND_TIME, COMPUTE_TIME)
+
+# - the number of groups the values of a batch are split into, each with a
+# different jitter of their time to live
+_JITTER_GROUPS = 4
+
+
+def key_checker(backend, hash_keys=False, key_namespace=''):
+    """Returns the function telling whether a key built for `backend` is
+    allowed as it is, or `None` if keys are used as they are, with no
+    `key_namespace` nor digests.
+    """
+    if isinstance(backend, InstanceCache):
+        # - the keys of an `InstanceCache` stay in-process, as they are
+        return None
+    if hash_keys:
+        return lambda key: False
+    if getattr(backend, 'restricts_keys', False):
+        return backend.key_allowed
+    if key_namespace:
+        return lambda key: True
+    return None
+
+
+def bound_tag(build_tag, key_allowed, key_namespace=''):
+    """Returns a function building a tag with `build_tag`, prefixed with the
+    `key_namespace` and replaced with a digest if the key holding its
+    generation is not allowed.
+    """
+    return bound_key(build_tag, lambda tag: key_allowed(tag_key(tag)),
+                     key_namespace)
 
 
 class CacheDecoratorFactory:
 
-    def __init__(self, backend, cache_key='', expire_key='', **other_kwargs):
+    def __init__(self, backend, cache_key='', expire_key='',
+                 single_flight=False, stale_while_revalidate=0,
+                 refresh_executor=None, negative_ttl=0, batched=False,
+                 tags=(), expire_tags=(), update_key='', max_age=None,
+                 ttl_jitter=0, hash_keys=False, key_namespace='',
+                 circuit_breaker=None, per_instance=False, **other_kwargs):
+        # - the time to live of the cached values is passed to `set()`, but
+        # for backends that do not derive from `BaseCache`, which might not
+        # accept it, and take the `max_age` from their config instead
+        accepts_ttl = isinstance(backend, BaseCache)
+        if circuit_breaker is True:
+            circuit_breaker = breaker_for(backend)
+        elif circuit_breaker and not isinstance(circuit_breaker,
+                                                CircuitBreaker):
+            raise ValueError('circuit_breaker must be True or a '
+                             'CircuitBreaker')
+        self.circuit_breaker = circuit_breaker or None
+        self.per_instance = per_instance
+        if per_instance and (tags or batched):
+            raise ValueError('per_instance does not support tags or batched')
+        if tags:
+            if iscoroutinefunction(getattr(backend, 'get', None)):
+                raise ValueError('tags are not supported by async backends')
+            backend = TaggedCache(backend)
         self._backend = backend
+        # - backends that do not derive from `BaseCache` might not accept a
+        # default for `get()`, for those a `None` is considered a miss
+        self._miss_aware = isinstance(backend, BaseCache)
+        if negative_ttl and not accepts_ttl:
+            # - their `set()` might not accept a `ttl`, and a cached `None`
+            # is read as a miss anyway
+            raise ValueError('negative_ttl requires a backend derived from '
+                             'BaseCache')
+        self.negative_ttl = negative_ttl
+        self.max_age = max_age
+        if not 0 <= ttl_jitter <= 1:
+            raise ValueError('ttl_jitter must be between 0 and 1')
+        self.ttl_jitter = ttl_jitter
+        self._default_ttl = max_age if accepts_ttl else None
+        if max_age and not accepts_ttl:
+            other_kwargs['max_age'] = max_age
+        self.single_flight = single_flight
+        self.stale_while_revalidate = stale_while_revalidate
+        self._refresh_executor = refresh_executor
+        self.stats = CacheStats()
         self._backend.config.update(other_kwargs)
 
+        self.key = ''
         if cache_key:
             self.key = cache_key
             self._wrapped = self._caching_wrapper
+            if stale_while_revalidate:
+                if not max_age:
+                    raise ValueError('stale_while_revalidate requires max_age')
+                if not accepts_ttl:
+                    # - the stale values are stored with `set_entry()`, for
+                    # longer than `max_age`
+                    raise ValueError('stale_while_revalidate requires a '
+                                     'backend derived from BaseCache')
+                self._wrapped = self._stale_caching_wrapper
+            if batched:
+                if stale_while_revalidate:
+                    raise ValueError('batched does not support '
+                                     'stale_while_revalidate')
+                self._wrapped = self._batch_caching_wrapper
 
-        if expire_key:
+        if expire_key or expire_tags:
             self.key = expire_key
             self._wrapped = self._expiry_wrapper
 
         self.ignore_errors = other_kwargs.get('ignore_errors', True)
+        self.key_namespace = key_namespace
+        self._key_allowed = key_checker(self._backend, hash_keys,
+                                        key_namespace)
+        self._tags = [self._compile_key(tag, True) for tag in tags]
+        # - the automatic key is built once the function is known
+        self._auto_key = self.key == AUTO and \
+            self._wrapped != self._expiry_wrapper
+        self._build_key = self._key_builder(self.key)
+        self._build_tags = [self._compile_key(tag, True)
+                            for tag in expire_tags]
+        if update_key:
+            if cache_key:
+                raise ValueError('update_key cannot be combined with '
+                                 'cache_key')
+            self._expiring = bool(expire_key or expire_tags)
+            self._wrapped = self._update_wrapper
+            self._build_update_key = self._key_builder(update_key)
+
+    def _compile_key(self, template, is_tag=False):
+        """Returns a function building the key (or tag) from `template`,
+        prefixed with the `key_namespace` and replaced with a digest if it is
+        not allowed by the backend (or if all keys are to be hashed).
+        """
+        build_key = compile_key(template)
+        if self.per_instance and not is_tag:
+            build_key = instance_key_builder(build_key, self._backend)
+        key_allowed = self._key_allowed
+        if key_allowed is None:
+            return build_key
+        if is_tag:
+            return bound_tag(build_key, key_allowed, self.key_namespace)
+        return bound_key(build_key, key_allowed, self.key_namespace)
+
+    def _key_builder(self, template):
+        """Returns the function building the key from `template`, along with
+        the `tags` of the cached value, if any.
+        """
+        build_key = self._compile_key(template)
+        build_tags = self._tags
+        if not build_tags:
+            return build_key
+
+        def build_tagged_key(*args, **kwargs):
+            return TaggedKey(build_key(*args, **kwargs),
+                             [build_tag(*args, **kwargs)
+                              for build_tag in build_tags])
+        return build_tagged_key
 
     def __call__(self, func):
-        return self._wrapped(func)
+        if not iscoroutinefunction(func) and \
+                iscoroutinefunction(getattr(self._backend, 'get', None)):
+            # - a function that is not a coroutine function cannot await
+            # the backend
+            raise ValueError('async backends require a coroutine function')
+        if self._auto_key:
+            self._build_key = self._key_builder(
+                auto_key(func, method=self.per_instance))
+        wrapper = self._wrapped(func)
+        self.stats.name = '%s.%s' % (
+            func.__module__, getattr(func, '__qualname__', func.__name__))
+        wrapper.cache_info = self.stats.info
+        wrapper.cache_stats_reset = self.stats.reset
+        wrapper.circuit_breaker = self.circuit_breaker
+        return wrapper
 
     def _expiry_wrapper(self, func):
+        if iscoroutinefunction(func):
+            from . import aio
+            return aio.expiry_wrapper(self, func)
+
+        build_key = self._build_key if self.key else None
+        build_tags = self._build_tags
+
+        def expire(key, tags):
+            if key is not None:
+                self._delete(key)
+            if tags:
+                invalidate_tags(self._backend, tags)
+
         @wraps(func)
         def cache_deleter(*args, **kwargs):
-            key = self.key(*args, **kwargs) if callable(self.key) \
-                else self.key.format(*args, **kwargs)
-            try:
-                self._backend.delete(key)
-            except:
-                if not self.ignore_errors:
-                    raise
-
+            key = build_key(*args, **kwargs) if build_key else None
+            tags = [build_tag(*args, **kwargs) for build_tag in build_tags]
+            self._call_backend(None, expire, key, tags)
             return func(*args, **kwargs)
         return cache_deleter
 
+    def _update_wrapper(self, func):
+        if iscoroutinefunction(func):
+            from . import aio
+            return aio.update_wrapper(self, func)
+
+        build_key = self._build_update_key
+        call = self._expiry_wrapper(func) if self._expiring else func
+
+        @wraps(func)
+        def cache_updater(*args, **kwargs):
+            key = build_key(*args, **kwargs)
+            result = call(*args, **kwargs)
+            if result is not None:
+                self._set(key, result)
+            elif self.negative_ttl:
+                self._set(key, result, self.negative_ttl)
+            else:
+                # - `None` is not cached, so the previous value must go
+                self._call_backend(None, self._delete, key)
+            return result
+        return cache_updater
+
     def _caching_wrapper(self, func):
+        if iscoroutinefunction(func):
+            from . import aio
+            return aio.caching_wrapper(self, func)
+
+        build_key = self._build_key
+        flights = SingleFlight() if self.single_flight else None
+        miss_aware = self._miss_aware
+        breaker = self.circuit_breaker
+        stats = self.stats
+
+        def compute(key, args, kwargs):
+            start = timer()
+            result = func(*args, **kwargs)
+            stats.counters()[COMPUTE_TIME] += timer() - start
+            if result is not None:
+                self._set(key, result)
+            elif self.negative_ttl:
+                self._set(key, result, self.negative_ttl)
+            return result
+
         @wraps(func)
         def cache_setter(*args, **kwargs):
-            result = None
-            key = self.key(*args, **kwargs) if callable(self.key) \
-                else self.key.format(*args, **kwargs)
-            try:
-                result = self._backend.get(key)
-            except:
-                if not self.ignore_errors:
-                    raise
-
-            if not result:
-                result = func(*args, **kwargs)
+            counters = stats.counters()
+            result = MISS
+            key = build_key(*args, **kwargs)
+            if breaker is None:
+                # - the same as `_call_backend()`, inline since it is on the
+                # path of every hit
+                start = timer()
                 try:
-                    self._backend.set(key, result)
+                    result = self._backend.get(key, MISS) if miss_aware \
+                        else self._legacy_get(key)
                 except:
                     if not self.ignore_errors:
                         raise
+                    counters[ERRORS] += 1
+                finally:
+                    counters[BACKEND_CALLS] += 1
+                    counters[BACKEND_TIME] += timer() - start
+            else:
+                result = self._call_backend(MISS, self._get, key)
+
+            if result is not MISS:
+                counters[HITS] += 1
+            else:
+                counters[MISSES] += 1
+                if flights is None:
+                    result = compute(key, args, kwargs)
+                else:
+                    # - concurrent misses for this key wait for the first one
+                    # to compute (and cache) the result
+                    result = flights.do(key, compute, key, args, kwargs)
 
             return result
         return cache_setter
+
+    def _delete(self, key):
+        # - a key that is not cached is not an error of the backend
+        try:
+            self._backend.delete(key)
+        except KeyError:
+            pass
+
+    def _get(self, key):
+        if self._miss_aware:
+            return self._backend.get(key, MISS)
+        return self._legacy_get(key)
+
+    def _legacy_get(self, key):
+        value = self._backend.get(key)
+        return MISS if value is None else value
+
+    def _ttl(self, ttl):
+        """Returns `ttl` shortened by a random fraction of up to `ttl_jitter`,
+        so that values cached at the same time do not all expire together.
+        """
+        if ttl and self.ttl_jitter:
+            return ttl * (1 - self.ttl_jitter * random.random())
+        return ttl
+
+    def _ttl_groups(self, mapping, ttl):
+        """Splits `mapping` into groups of values to cache with the same
+        (jittered) `ttl`, returning `(group, ttl)` pairs.
+        """
+        if not (ttl and self.ttl_jitter) or len(mapping) < 2:
+            return [(mapping, self._ttl(ttl))]
+        groups = [{} for _ in range(_JITTER_GROUPS)]
+        for key, value in mapping.items():
+            random.choice(groups)[key] = value
+        return [(group, self._ttl(ttl)) for group in groups if group]
+
+    def _call_backend(self, default, method, *args, **kwargs):
+        """Returns the result of the backend `method`, counting the call in
+        the statistics, or `default` if it fails and errors are ignored, or if
+        the circuit breaker is open.
+        """
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            return default
+        counters = self.stats.counters()
+        start = timer()
+        try:
+            result = method(*args, **kwargs)
+        except:
+            if breaker is not None:
+                breaker.failure()
+            if not self.ignore_errors:
+                raise
+            counters[ERRORS] += 1
+            return default
+        finally:
+            elapsed = timer() - start
+            counters[BACKEND_CALLS] += 1
+            counters[BACKEND_TIME] += elapsed
+        if breaker is not None:
+            breaker.success(elapsed)
+        return result
+
+    def _set(self, key, value, ttl=None):
+        ttl = self._ttl(ttl or self._default_ttl)
+        if ttl:
+            self._call_backend(None, self._backend.set, key, value, ttl=ttl)
+        else:
+            self._call_backend(None, self._backend.set, key, value)
+
+    def _batch_caching_wrapper(self, func):
+        if iscoroutinefunction(func):
+            from . import aio
+            return aio.batch_caching_wrapper(self, func)
+
+        build_key = self._build_key
+        stats = self.stats
+
+        @wraps(func)
+        def batch_cache_setter(items, *args, **kwargs):
+            counters = stats.counters()
+            # - the key for each item is built as if the function was called
+            # with the item in place of the list of items
+            keys = dict((item, build_key(item, *args, **kwargs))
+                        for item in items)
+            cached = self._call_backend({}, self._get_many,
+                                        list(keys.values()))
+
+            results = dict((item, cached[key]) for item, key in keys.items()
+                           if key in cached)
+            missing = [item for item in keys if item not in results]
+            counters[HITS] += len(results)
+            counters[MISSES] += len(missing)
+            if missing:
+                start = timer()
+                computed = func(missing, *args, **kwargs)
+                counters[COMPUTE_TIME] += timer() - start
+                if not isinstance(computed, Mapping):
+                    computed = dict(zip(missing, computed))
+                results.update(computed)
+                self._set_many(dict((keys[item], value)
+                                    for item, value in computed.items()
+                                    if item in keys))
+
+            return dict((item, results[item]) for item in keys
+                        if item in results)
+        return batch_cache_setter
+
+    def _get_many(self, keys):
+        if self._miss_aware:
+            return self._backend.get_many(keys)
+
+        values = {}
+        for key in keys:
+            value = self._legacy_get(key)
+            if value is not MISS:
+                values[key] = value
+        return values
+
+    def _set_many(self, mapping):
+        values = dict((key, value) for key, value in mapping.items()
+                      if value is not None)
+        nones = dict((key, value) for key, value in mapping.items()
+                     if value is None) if self.negative_ttl else {}
+        self._call_backend(None, self._store_many, values, nones)
+
+    def _store_many(self, values, nones):
+        if not self._miss_aware:
+            for key, value in values.items():
+                self._backend.set(key, value)
+            return
+
+        for group, ttl in self._ttl_groups(values, self._default_ttl) + \
+                self._ttl_groups(nones, self.negative_ttl):
+            if not group:
+                continue
+            if ttl:
+                self._backend.set_many(group, ttl=ttl)
+            else:
+                self._backend.set_many(group)
+
+    def _stale_caching_wrapper(self, func):
+        if iscoroutinefunction(func):
+            from . import aio
+            return aio.stale_caching_wrapper(self, func)
+
+        build_key = self._build_key
+        flights = SingleFlight() if self.single_flight else None
+        max_age, grace = self.max_age, self.stale_while_revalidate
+        refreshing = set()
+        refreshing_lock = threading.Lock()
+        stats = self.stats
+
+        def compute(key, args, kwargs):
+            counters = stats.counters()
+            start = timer()
+            result = func(*args, **kwargs)
+            counters[COMPUTE_TIME] += timer() - start
+            ttl = self._ttl(max_age if result is not None
+                            else self.negative_ttl)
+            if ttl:
+                self._call_backend(None, self._backend.set_entry, key, result,
+                                   time.time() + ttl, ttl + grace)
+            return result
+
+        def refresh(key, args, kwargs):
+            try:
+                compute(key, args, kwargs)
+            finally:
+                with refreshing_lock:
+                    refreshing.discard(key)
+
+        @wraps(func)
+        def stale_cache_setter(*args, **kwargs):
+            counters = stats.counters()
+            key = build_key(*args, **kwargs)
+            entry = self._call_backend(None, self._backend.get_entry, key)
+
+            if entry:
+                value, soft_expiry = entry
+                now = time.time()
+                if now < soft_expiry:
+                    counters[HITS] += 1
+                    return value
+
+                if now < soft_expiry + grace:
+                    # - serve the stale value, while (just one) refresh runs
+                    # in the background
+                    with refreshing_lock:
+                        started = key in refreshing
+                        refreshing.add(key)
+                    if not started:
+                        try:
+                            self.refresh_executor.submit(refresh, key, args,
+                                                         kwargs)
+                        except RuntimeError:
+                            # - the executor was shut down, leave it to the
+                            # next caller
+                            with refreshing_lock:
+                                refreshing.discard(key)
+                    counters[HITS] += 1
+                    return value
+
+            counters[MISSES] += 1
+            if flights is None:
+                return compute(key, args, kwargs)
+            return flights.do(key, compute, key, args, kwargs)
+        return stale_cache_setter
+
+    @property
+    def refresh_executor(self):
+        if self._refresh_executor is None:
+            self._refresh_executor = get_refresh_executor()
+        return self._refresh_executor
+
+
+_refresh_executor = None
+_refresh_executor_lock = threading.Lock()
+
+
+def get_refresh_executor():
+    """Returns the thread pool used to refresh stale values in the background,
+    by the decorators that were not passed a `refresh_executor` of their own.
+    """
+    global _refresh_executor
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix='supycache-refresh')
+    return _refresh_executor
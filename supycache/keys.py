@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Building cache keys from `cache_key`/`expire_key` templates.
+
+A key template is either a callable, which is used as-is, or a format string,
+which is parsed *once* by `compile_key` into a specialized function that
+builds the key from the arguments passed to the decorated function, without
+re-parsing the template on every call. `auto_key` builds keys from all the
+arguments of a function instead.
+"""
+import hashlib
+import inspect
+import keyword
+import pickle
+import re
+from string import Formatter
+
+from _string import formatter_field_name_split
+
+_formatter = Formatter()
+_conversions = {'s': 'str', 'r': 'repr', 'a': 'ascii'}
+
+_digest = lambda data: hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# - the characters memcached does not allow in keys
+_unsafe = re.compile(r'[\x00-\x20\x7f]')
+
+
+def compile_key(template):
+    """Returns a function that builds a key from `(*args, **kwargs)`.
+
+    - callables are returned unchanged.
+    - templates without any replacement fields return a constant key.
+    - other templates are translated to a single `%`-format expression that
+      does the same lookups, conversions and formatting `str.format()` would.
+
+    Templates that cannot be specialized (for instance, nested replacement
+    fields in a format spec) fall back to calling `.format()` at run-time.
+    """
+    if callable(template):
+        return template
+
+    try:
+        parts = list(_formatter.parse(template))
+    except ValueError:
+        # - preserve the error being raised at call time, as `.format()`
+        # would have done
+        return _format_key(template)
+
+    if all(field is None for _, field, _, _ in parts):
+        constant = ''.join(literal for literal, _, _, _ in parts)
+        return lambda *args, **kwargs: constant
+
+    source = _key_source(parts)
+    if source is None:
+        return _format_key(template)
+
+    namespace = {'format': format}
+    exec(compile(source, '<supycache key %r>' % template, 'exec'), namespace)
+    return namespace['build_key']
+
+
+def _format_key(template):
+    def build_key(*args, **kwargs):
+        return template.format(*args, **kwargs)
+    return build_key
+
+
+def _key_source(parts):
+    """Returns the source of a `build_key` function for the parsed `parts`,
+    or `None` if the template is not one we know how to specialize.
+    """
+    pattern, values = [], []
+    auto_index = 0
+    auto_numbering = None
+    for literal, field, spec, conversion in parts:
+        pattern.append(literal.replace('%', '%%'))
+        if field is None:
+            continue
+
+        if '{' in spec:
+            return None
+
+        first, rest = formatter_field_name_split(field)
+        if first == '':
+            if auto_numbering is False:
+                return None
+            auto_numbering = True
+            first, auto_index = auto_index, auto_index + 1
+        elif isinstance(first, int):
+            if auto_numbering:
+                return None
+            auto_numbering = False
+
+        expr = 'args[%d]' % first if isinstance(first, int) \
+            else 'kwargs[%r]' % first
+        for is_attr, name in rest:
+            if is_attr:
+                if not _is_identifier(name):
+                    return None
+                expr += '.%s' % name
+            else:
+                expr += '[%r]' % name
+
+        if conversion:
+            if conversion not in _conversions:
+                return None
+            expr = '%s(%s)' % (_conversions[conversion], expr)
+        values.append('format(%s, %r)' % (expr, spec))
+        pattern.append('%s')
+
+    return ('def build_key(*args, **kwargs):\n'
+            '    return %r %% (%s,)\n' % (''.join(pattern), ', '.join(values)))
+
+
+def _is_identifier(name):
+    # - keywords (`'{0.class}'`) cannot follow a `.` in the generated source
+    return name.isidentifier() and not keyword.iskeyword(name)
+
+
+def digest_key(key, prefix_length=32):
+    """Returns a short stand-in for `key`, safe for any backend: the first
+    `prefix_length` characters of `key`, with whitespace and control
+    characters replaced, to keep it readable, followed by a 128 bit blake2b
+    digest of the whole key.
+    """
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+    elif not isinstance(key, str):
+        key = repr(key)
+    prefix = _unsafe.sub('_', key[:prefix_length])
+    digest = _digest(key.encode('utf-8'))
+    return '%s#%s' % (prefix, digest) if prefix else digest
+
+
+def bound_key(build_key, key_allowed, namespace='', prefix_length=32):
+    """Returns a function that builds a key with `build_key`, prefixed with
+    the `namespace`, and replaces it with its `digest_key()` (still prefixed
+    with the `namespace`) if `key_allowed(key)` is false.
+    """
+    def build_bounded_key(*args, **kwargs):
+        key = build_key(*args, **kwargs)
+        if namespace:
+            key = namespace + key
+        if key_allowed(key):
+            return key
+        return namespace + digest_key(key[len(namespace):], prefix_length)
+    return build_bounded_key
+
+
+# - the `cache_key` for keys built by `auto_key()`
+AUTO = 'auto'
+
+_scalars = frozenset([str, int, float, bool, bytes, type(None)])
+_sequences = {tuple: '(%s)', list: '[%s]'}
+
+
+def _canonical(value):
+    """Returns a string that is the same for equal arguments, in any process:
+    `repr()` for scalars, with the items of dicts and sets sorted, and the
+    digest of the pickle for other objects.
+    """
+    kind = type(value)
+    if kind in _scalars:
+        return repr(value)
+    if kind in _sequences:
+        if _scalars.issuperset(map(type, value)):
+            return repr(value)
+        return _sequences[kind] % ','.join(_canonical(item) for item in value)
+    if kind is dict:
+        return '{%s}' % ','.join(sorted('%s:%s' % (_canonical(key),
+                                                     _canonical(item))
+                                        for key, item in value.items()))
+    if kind is set or kind is frozenset:
+        return '%s{%s}' % (kind.__name__,
+                           ','.join(sorted(_canonical(item)
+                                           for item in value)))
+    try:
+        data = pickle.dumps(value, 2)
+    except Exception:
+        raise TypeError('cannot build an automatic cache key from %r' %
+                        (value,))
+    return '%s.%s<%s>' % (kind.__module__, getattr(kind, '__qualname__',
+                                                  kind.__name__),
+                          _digest(data))
+
+
+def auto_key(func, method=False):
+    """Returns a function that builds a key from all the arguments of a call
+    of `func`: the qualified name of `func` followed by a digest of the
+    arguments, bound to the parameters of `func` (with their defaults), so
+    that `f(1)`, `f(x=1)` and, if `x` defaults to `1`, `f()` share a key.
+
+    Arguments do not need to be hashable: lists, dicts and sets are keyed on
+    their (sorted, for dicts and sets) items, other objects on their pickle.
+
+    If `method` is true, `func` is a method and the key is built from the
+    arguments that follow the instance (or class).
+    """
+    prefix = '%s.%s:' % (func.__module__,
+                         getattr(func, '__qualname__', func.__name__))
+    signature = inspect.signature(func)
+    parameters = list(signature.parameters.values())
+    if method:
+        parameters = parameters[1:]
+        signature = signature.replace(parameters=parameters)
+    simple = all(parameter.kind in (parameter.POSITIONAL_OR_KEYWORD,
+                                    parameter.KEYWORD_ONLY)
+                 for parameter in parameters)
+    names = [parameter.name for parameter in parameters]
+    positional = sum(1 for parameter in parameters
+                     if parameter.kind == parameter.POSITIONAL_OR_KEYWORD)
+    defaults = dict((parameter.name, parameter.default)
+                    for parameter in parameters
+                    if parameter.default is not parameter.empty)
+
+    def bind(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple(bound.arguments.values())
+
+    def build_auto_key(*args, **kwargs):
+        if not simple or len(args) > positional:
+            values = bind(args, kwargs)
+        elif len(args) == len(names):
+            values = args if not kwargs else bind(args, kwargs)
+        else:
+            # - the common case, without going through the (much slower)
+            # `signature.bind()`
+            values = list(args)
+            used = 0
+            for name in names[len(args):]:
+                if name in kwargs:
+                    values.append(kwargs[name])
+                    used += 1
+                elif name in defaults:
+                    values.append(defaults[name])
+                else:
+                    values = bind(args, kwargs)     # - raises a TypeError
+                    break
+            if used != len(kwargs):
+                values = bind(args, kwargs)
+        return prefix + _digest(_canonical(tuple(values)).encode(
+            'utf-8', 'surrogatepass'))
+    return build_auto_key
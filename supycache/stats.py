@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Hit/miss/latency statistics of the decorated functions.
+
+Each thread updates counters of its own, without any locking, and the
+counters of all threads are only added up when the statistics are read. The
+counters of a thread that exits are added to the totals of the threads that
+exited before, and no longer kept.
+"""
+import threading
+import weakref
+from collections import namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'errors',
+                                     'backend_calls', 'backend_time',
+                                     'compute_time'])
+
+# - indices of the counters in a thread's list of counters, in the same
+# order as the `CacheInfo` fields
+HITS, MISSES, ERRORS, BACKEND_CALLS, BACKEND_TIME, COMPUTE_TIME = range(6)
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+class _Owner(object):
+    """Held by the thread-local of a thread, so that its counters are retired
+    once it is dropped, when the thread exits.
+    """
+
+
+def _retire(stats_ref, counters):
+    stats = stats_ref()
+    if stats is not None:
+        stats._retire(counters)
+
+
+class CacheStats(object):
+    """The statistics of a decorated function:
+
+    - `hits`, `misses` : The number of values found and not found in the
+        cache.
+    - `errors` : The number of errors from the backend that were ignored.
+    - `backend_calls`, `backend_time` : The number of calls to the backend
+        and the total number of seconds spent in them.
+    - `compute_time` : The total number of seconds spent in the decorated
+        function on misses.
+    """
+
+    def __init__(self, name=''):
+        self.name = name
+        self._local = threading.local()
+        self._all_counters = []
+        # - the added up counters of the threads that exited
+        self._retired = [0, 0, 0, 0, 0.0, 0.0]
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.add(self)
+
+    def counters(self):
+        """Returns the list of counters of the calling thread."""
+        try:
+            return self._local.counters
+        except AttributeError:
+            counters = [0, 0, 0, 0, 0.0, 0.0]
+            owner = self._local.owner = _Owner()
+            retire = weakref.finalize(owner, _retire, weakref.ref(self),
+                                      counters)
+            retire.atexit = False
+            with self._lock:
+                self._all_counters.append(counters)
+            self._local.counters = counters
+            return counters
+
+    def _retire(self, counters):
+        with self._lock:
+            self._all_counters = [other for other in self._all_counters
+                                  if other is not counters]
+            self._retired = [total + count for total, count in
+                             zip(self._retired, counters)]
+
+    def info(self):
+        with self._lock:
+            all_counters = self._all_counters + [self._retired]
+        return CacheInfo(*[sum(column) for column in zip(*all_counters)])
+
+    def reset(self):
+        with self._lock:
+            for counters in self._all_counters:
+                counters[:] = [0, 0, 0, 0, 0.0, 0.0]
+            self._retired = [0, 0, 0, 0, 0.0, 0.0]
+
+
+def cache_stats():
+    """Returns a dict mapping the name of every decorated function to its
+    `CacheInfo`. The statistics of functions with the same name (for
+    instance, closures decorated more than once) are added up.
+    """
+    with _registry_lock:
+        registered = list(_registry)
+
+    stats = {}
+    for cache in registered:
+        info = cache.info()
+        if cache.name in stats:
+            info = CacheInfo(*[sum(pair) for pair in
+                               zip(stats[cache.name], info)])
+        stats[cache.name] = info
+    return stats
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import unittest
+import supycache
+from supycache.backends import DictCache
+from supycache.backends.aio import AsyncDictCache
+
+
+class TestAsyncCacheDecorators(unittest.TestCase):
+    """ Test the CacheDecorators on coroutine functions
+    """
+
+    def setUp(self):
+        self.backend = AsyncDictCache()
+        self.default_backend = supycache.default_backend
+        supycache.default_backend = self.backend
+
+    def tearDown(self):
+        supycache.default_backend = self.default_backend
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_async_dict_cache(self):
+        """Testing AsyncDictCache methods"""
+        async def methods():
+            await self.backend.set('key', 'value')
+            self.assertEqual(await self.backend.get('key'), 'value')
+            self.assertFalse(bool(await self.backend.get('non-existent')))
+            await self.backend.delete('key')
+            self.assertFalse(bool(await self.backend.get('key')))
+            await self.backend.clear()
+            self.assertEqual(len(self.backend.data), 0)
+        self.run_async(methods())
+
+    def test_decorator_for_cache_key(self):
+        """ caching the result (not the coroutine) of a coroutine function
+        """
+        @supycache.supycache(cache_key='{0}')
+        async def simple_function(key, call_count):
+            await asyncio.sleep(0)
+            return '%d:cached_value' % call_count
+
+        async def calls():
+            self.assertEqual(await simple_function('key', 1), '1:cached_value')
+            self.assertEqual(await simple_function('key', 2), '1:cached_value')
+            self.assertEqual(await self.backend.get('key'), '1:cached_value')
+        self.run_async(calls())
+
+    def test_decorator_for_cache_key_sync_backend(self):
+        """ caching the result of a coroutine function with a sync backend
+        """
+        backend = DictCache()
+
+        @supycache.supycache(backend=backend, cache_key='{0}')
+        async def simple_function(key, call_count):
+            return '%d:cached_value' % call_count
+
+        self.run_async(simple_function('key', 1))
+        self.assertEqual(self.run_async(simple_function('key', 2)),
+                         '1:cached_value')
+        self.assertEqual(backend.get('key'), '1:cached_value')
+
+    def test_decorator_for_sync_function(self):
+        """ rejecting async backends for functions that cannot await them
+        """
+        def simple_function(key):
+            return 'value'
+
+        for options in ({'cache_key': '{0}'}, {'expire_key': '{0}'},
+                        {'cache_key': '{0}', 'backend': AsyncDictCache()}):
+            self.assertRaises(ValueError, supycache.supycache(**options),
+                              simple_function)
+
+    def test_decorator_for_cache_key_concurrent_awaits(self):
+        """ concurrent awaits for a key call the coroutine function once
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='{0}')
+        async def simple_function(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return '%d:cached_value' % len(calls)
+
+        async def concurrent():
+            return await asyncio.gather(*[simple_function('key')
+                                          for _ in range(10)])
+
+        self.assertEqual(self.run_async(concurrent()), ['1:cached_value'] * 10)
+        self.assertEqual(calls, ['key'])
+
+    def test_decorator_for_cache_key_concurrent_errors(self):
+        """ concurrent awaits for a key share the exception raised
+        """
+        class TestException(Exception):
+            pass
+
+        @supycache.supycache(cache_key='{0}')
+        async def simple_function(key):
+            await asyncio.sleep(0.01)
+            raise TestException()
+
+        async def concurrent():
+            return await asyncio.gather(*[simple_function('key')
+                                          for _ in range(5)],
+                                        return_exceptions=True)
+
+        errors = self.run_async(concurrent())
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, TestException)
+                            for error in errors))
+
+    def test_decorator_for_expire_key(self):
+        """ expire a key before awaiting the coroutine function
+        """
+        @supycache.supycache(cache_key='simple_key')
+        async def simple_function():
+            return 'simple_value'
+
+        @supycache.supycache(expire_key='simple_key')
+        async def simple_expiry():
+            return 'ignored_value'
+
+        async def calls():
+            await simple_function()
+            self.assertEqual(await self.backend.get('simple_key'),
+                             'simple_value')
+            self.assertEqual(await simple_expiry(), 'ignored_value')
+            self.assertFalse(bool(await self.backend.get('simple_key')))
+        self.run_async(calls())
+
+    def test_decorator_for_cache_key_stale_while_revalidate(self):
+        """ serving stale values while refreshing them in a task
+        """
+        from unittest import mock
+
+        calls = []
+
+        @supycache.supycache(cache_key='simple_key', max_age=10,
+                             stale_while_revalidate=5)
+        async def simple_function():
+            calls.append(1)
+            return '%d:cached_value' % len(calls)
+
+        async def stale():
+            with mock.patch('time.time', return_value=1000):
+                self.assertEqual(await simple_function(), '1:cached_value')
+            with mock.patch('time.time', return_value=1012):
+                self.assertEqual(await simple_function(), '1:cached_value')
+                await asyncio.sleep(0.01)
+                self.assertEqual(await simple_function(), '2:cached_value')
+        self.run_async(stale())
+
+    def test_decorator_for_cache_key_batched(self):
+        """ caching the results of a coroutine function for a list of items
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='user:{0}', batched=True)
+        async def get_users(ids):
+            calls.append(list(ids))
+            return dict((i, 'user_%s' % i) for i in ids)
+
+        async def batches():
+            self.assertEqual(await get_users([1, 2]),
+                             {1: 'user_1', 2: 'user_2'})
+            self.assertEqual(await get_users([2, 3]),
+                             {2: 'user_2', 3: 'user_3'})
+            self.assertEqual(await self.backend.get_many(['user:1', 'user:4']),
+                             {'user:1': 'user_1'})
+        self.run_async(batches())
+        self.assertEqual(calls, [[1, 2], [3]])
+
+    def test_decorator_for_update_key(self):
+        """ writing the result of a coroutine function to a key
+        """
+        @supycache.supycache(update_key='user:{0}', expire_key='users')
+        async def save_user(user_id, name):
+            return {'id': user_id, 'name': name}
+
+        async def update():
+            await self.backend.set('users', [1])
+            await save_user(1, 'steve')
+            self.assertEqual(await self.backend.get('user:1'),
+                             {'id': 1, 'name': 'steve'})
+            self.assertEqual(await self.backend.get('users'), None)
+        self.run_async(update())
+
+    def test_decorator_for_cache_key_circuit_breaker(self):
+        """ caching skips a failing backend once the breaker is open
+        """
+        from supycache.breaker import CircuitBreaker, OPEN
+
+        class FailingCache(AsyncDictCache):
+            calls = 0
+
+            async def get(self, key, default=None):
+                self.calls += 1
+                raise IOError('cache is down')
+
+            async def set(self, key, value, ttl=None):
+                self.calls += 1
+                raise IOError('cache is down')
+
+        backend = FailingCache()
+
+        @supycache.supycache(backend=backend, cache_key='{0}',
+                             circuit_breaker=CircuitBreaker(
+                                 failure_threshold=2))
+        async def simple_function(key):
+            return key
+
+        async def calls():
+            for key in range(4):
+                self.assertEqual(await simple_function(key), key)
+        self.run_async(calls())
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(simple_function.circuit_breaker.state, OPEN)
+
+    def test_decorator_for_cache_key_per_instance_concurrent(self):
+        """ concurrent awaits on different instances are not merged
+        """
+        class Account(object):
+            def __init__(self, balance):
+                self.balance = balance
+
+            @supycache.supycache(cache_key='{0}', per_instance=True)
+            async def interest(self, rate):
+                await asyncio.sleep(0)
+                return self.balance * rate
+
+        async def calls():
+            return await asyncio.gather(Account(1).interest(2),
+                                        Account(100).interest(2))
+        self.assertEqual(self.run_async(calls()), [2, 200])
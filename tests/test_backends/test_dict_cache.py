@@ -2,8 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+from unittest import mock
 import supycache
 
+
 class TestDictCache(unittest.TestCase):
     """ Test the DictCache backend
     """
@@ -29,6 +31,14 @@ class TestDictCache(unittest.TestCase):
         self.assertTrue(self.cache.clear() == None)
         self.assertTrue(len(self.cache.data) == 0)
 
+    def test_misses(self):
+        """Testing DictCache get() misses do not insert keys"""
+        sentinel = object()
+        self.cache.set('none', None)
+        self.assertTrue(self.cache.get('none', sentinel) is None)
+        self.assertTrue(self.cache.get('non-existent', sentinel) is sentinel)
+        self.assertEqual(list(self.cache.data), ['none'])
+
 
 class TestExpiringDictCache(unittest.TestCase):
     """ Test the DictCache backend with max_age parameter
@@ -47,7 +57,8 @@ class TestExpiringDictCache(unittest.TestCase):
         def simple_function():
             return 'simple_value'
 
-        self.assertTrue(self.cache.data['DoesNotExist'] == ('', 0))
+        self.assertTrue(self.cache.get('DoesNotExist') is None)
+        self.assertFalse('DoesNotExist' in self.cache.data)
 
     def test_get_without_ignoring_errors(self):
         """Testing expiring DictCache get() method without ignoring errors"""
@@ -56,8 +67,9 @@ class TestExpiringDictCache(unittest.TestCase):
         def simple_function():
             return 'simple_value'
 
-        with self.assertRaises(KeyError) as context:
-            simple_function()
+        # - a miss is not an error
+        self.assertTrue(simple_function() == 'simple_value')
+        self.assertTrue(self.cache.get('simple_key') == 'simple_value')
 
 
     def test_get_with_ignoring_errors(self):
@@ -70,3 +82,233 @@ class TestExpiringDictCache(unittest.TestCase):
         self.assertTrue(simple_function() == 'simple_value')
         self.assertTrue(self.cache.get('simple_key') == 'simple_value')
         self.assertTrue(self.cache.data['simple_key'][1] != 0)
+
+
+    def test_expired_values_are_freed(self):
+        """Testing expiring DictCache frees values that are never read"""
+        cache = supycache.backends.DictCache(config={'max_age': 10})
+        with mock.patch('time.time', return_value=1000):
+            for key in 'abcd':
+                cache.set(key, key)
+        with mock.patch('time.time', return_value=1005):
+            cache.set('e', 'e')
+        with mock.patch('time.time', return_value=1011):
+            cache.set('f', 'f')
+            self.assertEqual(sorted(cache.data), ['c', 'd', 'e', 'f'])
+            cache.set('g', 'g')
+            self.assertEqual(sorted(cache.data), ['e', 'f', 'g'])
+
+    def test_purge_expired(self):
+        """Testing expiring DictCache purge_expired() method"""
+        cache = supycache.backends.DictCache(config={'max_age': 10})
+        with mock.patch('time.time', return_value=1000):
+            for key in 'abcd':
+                cache.set(key, key)
+            cache.delete('c')
+            cache.set('c', 'c')
+        with mock.patch('time.time', return_value=1011):
+            cache.purge_expired()
+        self.assertEqual(len(cache.data), 0)
+        self.assertEqual(len(cache._expiries), 0)
+
+    def test_overwrites_do_not_grow_expiries(self):
+        """Testing overwriting a DictCache key keeps the expiry heap bounded"""
+        cache = supycache.backends.DictCache()
+        for i in range(10000):
+            cache.set('a', i, ttl=10)
+        self.assertEqual(cache.get('a'), 9999)
+        self.assertTrue(len(cache._expiries) <= 2 * len(cache.data) + 64)
+
+class TestBoundedDictCache(unittest.TestCase):
+    """ Test the DictCache backend with max_entries parameter
+    """
+
+    def make_cache(self, policy, **config):
+        config.update(max_entries=3, eviction_policy=policy)
+        return supycache.backends.DictCache(config=config)
+
+    def test_lru(self):
+        """Testing DictCache evicts the least recently used key"""
+        cache = self.make_cache('lru')
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('d', 'd')
+        self.assertEqual(sorted(cache.data), ['a', 'c', 'd'])
+
+    def test_lfu(self):
+        """Testing DictCache evicts the least frequently used key"""
+        cache = self.make_cache('lfu')
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        cache.set('d', 'd')
+        self.assertEqual(sorted(cache.data), ['a', 'b', 'd'])
+        cache.get('d')
+        cache.set('e', 'e')
+        self.assertEqual(sorted(cache.data), ['a', 'd', 'e'])
+
+    def test_fifo(self):
+        """Testing DictCache evicts the first stored key"""
+        cache = self.make_cache('fifo')
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('a', 'changed')
+        cache.set('d', 'd')
+        self.assertEqual(sorted(cache.data), ['b', 'c', 'd'])
+
+    def test_misses_and_deletes(self):
+        """Testing DictCache misses and deletes do not count as entries"""
+        cache = self.make_cache('lru')
+        for key in 'abc':
+            cache.set(key, key)
+            self.assertFalse(bool(cache.get('missing-' + key)))
+        cache.delete('b')
+        cache.set('d', 'd')
+        self.assertEqual(sorted(cache.data), ['a', 'c', 'd'])
+        cache.clear()
+        cache.set('e', 'e')
+        self.assertEqual(len(cache.data), 1)
+
+    def test_with_max_age(self):
+        """Testing bounded DictCache with max_age parameter"""
+        cache = self.make_cache('lru', max_age=10)
+        for key in 'abcd':
+            cache.set(key, key)
+        self.assertEqual(sorted(cache.data), ['b', 'c', 'd'])
+        self.assertEqual(cache.get('b'), 'b')
+        cache.data['c'] = ('c', 1)      # - expire c
+        self.assertTrue(cache.get('c') is None)
+        cache.set('e', 'e')
+        self.assertEqual(sorted(cache.data), ['b', 'd', 'e'])
+
+    def test_unknown_policy(self):
+        """Testing DictCache with an unknown eviction policy"""
+        with self.assertRaises(ValueError):
+            self.make_cache('random').data
+
+
+class TestSizedDictCache(unittest.TestCase):
+    """ Test the DictCache backend with a max_bytes budget
+    """
+
+    def make_cache(self, **config):
+        config.setdefault('sizer', len)
+        return supycache.backends.DictCache(config=config)
+
+    def test_memory_used(self):
+        """Testing DictCache keeps count of the size of its values"""
+        cache = self.make_cache(max_bytes=100)
+        cache.set('a', 'x' * 10)
+        cache.set('b', 'x' * 20)
+        self.assertEqual(cache.memory_used, 30)
+        cache.set('a', 'x' * 5)
+        self.assertEqual(cache.memory_used, 25)
+        cache.delete('b')
+        self.assertEqual(cache.memory_used, 5)
+        cache.clear()
+        self.assertEqual(cache.memory_used, 0)
+        unbounded = supycache.backends.DictCache(config={'sizer': len})
+        unbounded.set('a', 'x' * 10)
+        self.assertEqual(unbounded.memory_used, 10)
+
+    def test_default_sizer(self):
+        """Testing DictCache estimates sizes from the pickled values"""
+        cache = supycache.backends.DictCache(config={'max_bytes': 10 ** 6})
+        cache.set('a', 'x' * 1000)
+        self.assertTrue(1000 < cache.memory_used < 1100)
+        cache.set('b', lambda: None)    # - cannot be pickled
+        self.assertTrue(cache.memory_used > 1100)
+
+    def test_budget(self):
+        """Testing DictCache evicts values to stay within max_bytes"""
+        cache = self.make_cache(max_bytes=100, eviction_policy='lru')
+        for key in 'abcd':
+            cache.set(key, 'x' * 30)
+        self.assertEqual(sorted(cache.data), ['b', 'c', 'd'])
+        cache.get('b')
+        cache.set('e', 'x' * 40)
+        self.assertEqual(sorted(cache.data), ['b', 'd', 'e'])
+        self.assertTrue(cache.memory_used <= 100)
+
+    def test_too_large(self):
+        """Testing DictCache does not store values larger than max_bytes"""
+        cache = self.make_cache(max_bytes=100)
+        cache.set('a', 'small')
+        cache.set('a', 'x' * 101)
+        cache.set('b', 'x' * 101)
+        self.assertEqual(len(cache.data), 0)
+        self.assertEqual(cache.memory_used, 0)
+
+    def test_greedy_dual_size(self):
+        """Testing DictCache evicts large, rarely used values first"""
+        cache = self.make_cache(max_bytes=1000)
+        cache.set('report', 'x' * 600)
+        for key in 'abcd':
+            cache.set(key, 'x' * 50)
+            cache.get(key)
+        cache.get('report')
+        cache.set('e', 'x' * 250)
+        self.assertEqual(sorted(cache.data), ['a', 'b', 'c', 'd', 'e'])
+        # - values that are no longer used age out, whatever their size
+        for _ in range(10):
+            for key in 'bcde':
+                cache.get(key)
+            cache.set('f', 'x' * 10)
+            cache.delete('f')
+        cache.set('g', 'x' * 600)
+        self.assertTrue('a' not in cache.data)
+        self.assertTrue('g' in cache.data)
+
+    def test_overwrite_keeps_frequency(self):
+        """Testing DictCache keeps the frequency of overwritten keys"""
+        cache = self.make_cache(max_bytes=100)
+        cache.set('a', 'x' * 10)
+        for _ in range(4):
+            cache.get('a')
+        cache.set('a', 'y' * 10)
+        cache.set('b', 'x' * 10)
+        cache.set('c', 'x' * 85)
+        self.assertEqual(sorted(cache.data), ['a', 'c'])
+        self.assertEqual(cache.memory_used, 95)
+
+    def test_with_max_entries(self):
+        """Testing DictCache with both max_bytes and max_entries"""
+        cache = self.make_cache(max_bytes=1000, max_entries=2)
+        for key in 'abc':
+            cache.set(key, 'x')
+        self.assertEqual(len(cache.data), 2)
+        self.assertEqual(cache.memory_used, 2)
+
+    def test_sharded(self):
+        """Testing ShardedDictCache splits max_bytes between its shards"""
+        cache = supycache.backends.ShardedDictCache(
+            config={'max_bytes': 400, 'sizer': len}, shards=4)
+        for i in range(100):
+            cache.set('key-%d' % i, 'x' * 10)
+        self.assertTrue(cache.memory_used <= 400)
+        self.assertEqual(cache.memory_used, 10 * len(cache))
+        cache.set('large', 'x' * 101)   # - larger than a shard's share
+        self.assertEqual(cache.get('large'), None)
+        self.assertRaises(ValueError, supycache.backends.ShardedDictCache,
+                          config={'max_bytes': 10}, shards=16)
+
+
+class TestDictCacheBatches(unittest.TestCase):
+    """ Test the DictCache backend batch methods
+    """
+
+    def test_many(self):
+        """Testing DictCache get_many(), set_many() and delete_many()"""
+        cache = supycache.backends.DictCache(config={'max_age': 10})
+        cache.set_many({'a': 1, 'b': None, 'c': 0})
+        self.assertEqual(cache.get_many(['a', 'b', 'c', 'd']),
+                         {'a': 1, 'b': None, 'c': 0})
+        cache.data['a'] = (1, 1)        # - expire a
+        self.assertEqual(cache.get_many(['a', 'c']), {'c': 0})
+        self.assertFalse('a' in cache.data)
+        cache.delete_many(['b', 'd'])
+        self.assertEqual(list(cache.data), ['c'])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gc
+import unittest
+from supycache.backends import InstanceCache
+from supycache.backends.instance import (InstanceKey, instance_key_builder,
+                                         instance_token)
+
+
+class Instance(object):
+    pass
+
+
+class Slotted(object):
+    __slots__ = ('value',)
+
+
+class TestInstanceCache(unittest.TestCase):
+    """ Test the InstanceCache backend
+    """
+
+    def setUp(self):
+        self.cache = InstanceCache(config={'max_entries': 2})
+
+    def test_methods(self):
+        """Testing InstanceCache keeps the values of each instance apart"""
+        first, second = Instance(), Instance()
+        key = InstanceKey('key', self.cache.store(first))
+        other = InstanceKey('key', self.cache.store(second))
+        self.cache.set(key, 1)
+        self.assertEqual(self.cache.get(key), 1)
+        self.assertTrue(self.cache.get(other) is None)
+        self.cache.set('shared', 2)
+        self.assertEqual(self.cache.get('shared'), 2)
+        self.cache.delete(key)
+        self.cache.delete(key)
+        self.assertTrue(self.cache.get(key) is None)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_config(self):
+        """Testing InstanceCache config applies to each instance"""
+        instance = Instance()
+        store = self.cache.store(instance)
+        for key in 'abc':
+            self.cache.set(InstanceKey(key, store), key)
+        self.assertEqual(sorted(store.data), ['b', 'c'])
+
+    def test_garbage_collected(self):
+        """Testing InstanceCache drops the values of freed instances"""
+        instance = Instance()
+        self.cache.set(InstanceKey('key', self.cache.store(instance)), 1)
+        self.assertEqual(len(self.cache), 1)
+        del instance
+        gc.collect()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_not_weakly_referenceable(self):
+        """Testing InstanceCache requires weakly referenceable instances"""
+        self.assertRaises(TypeError, self.cache.store, Slotted())
+
+    def test_instance_token(self):
+        """Testing keys scoped to instances in a shared backend"""
+        first, second = Instance(), Instance()
+        build_key = instance_key_builder(lambda x: 'key_%s' % x, object())
+        self.assertEqual(build_key(first, 1), build_key(first, 1))
+        self.assertNotEqual(build_key(first, 1), build_key(second, 1))
+        self.assertTrue(build_key(first, 1).startswith(
+            instance_token(first)))
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import importlib
+import pickle
+import sys
+import types
+import unittest
+from unittest import mock
+from urllib.parse import urlsplit
+
+import supycache.backends
+from supycache.backends.pool import PoolTimeout
+from supycache.backends.serializers import Serializer
+
+
+class Client(object):
+    """A dummy pylibmc.Client, keeping the values of each list of servers in a
+    dict shared by its clients, as (data, flags, time) tuples
+    """
+    stores = {}
+
+    def __init__(self, servers, **kwargs):
+        self.kwargs = kwargs
+        self.data = Client.stores.setdefault(tuple(servers), {})
+        self.down = False
+
+    def serialize(self, value):
+        return pickle.dumps(value), 1
+
+    def deserialize(self, data, flags):
+        return pickle.loads(data) if flags & 1 else data
+
+    def _check(self):
+        if self.down:
+            raise IOError('memcached is down')
+
+    def get(self, key, default=None):
+        self._check()
+        if key not in self.data:
+            return default
+        data, flags, _ = self.data[key]
+        return self.deserialize(data, flags)
+
+    def set(self, key, value, time=0):
+        self._check()
+        data, flags = self.serialize(value)
+        self.data[key] = (data, flags, time)
+        return True
+
+    def delete(self, key):
+        self._check()
+        return self.data.pop(key, None) is not None
+
+    def flush_all(self):
+        self.data.clear()
+
+    def get_multi(self, keys):
+        return dict((key, self.get(key)) for key in keys if key in self.data)
+
+    def set_multi(self, mapping, time=0):
+        for key, value in mapping.items():
+            self.set(key, value, time)
+        return []
+
+    def delete_multi(self, keys):
+        return all([self.delete(key) for key in keys])
+
+
+def setUpModule():
+    global memcached
+    pylibmc = types.ModuleType('pylibmc')
+    pylibmc.Client = Client
+    with mock.patch.dict(sys.modules, {'pylibmc': pylibmc}):
+        sys.modules.pop('supycache.backends.memcached', None)
+        memcached = importlib.import_module('supycache.backends.memcached')
+    # - the module with the dummy client is not left for the other tests
+    supycache.backends.__dict__.pop('memcached', None)
+
+
+class TestMemcachedCache(unittest.TestCase):
+    """ Test the MemcachedCache backend, with a dummy pylibmc
+    """
+
+    def setUp(self):
+        Client.stores.clear()
+        self.cache = memcached.MemcachedCache(['127.0.0.1'], pool_size=1,
+                                              pool_timeout=0.01)
+
+    def test_methods(self):
+        """Testing MemcachedCache methods"""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('non-existent', 'default'), 'default')
+        self.cache.delete('key')
+        self.assertTrue(self.cache.get('key') is None)
+
+        self.cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': [2]})
+        self.cache.delete_many(['a'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), {'b': [2]})
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(['b']), {})
+
+    def test_pool(self):
+        """Testing MemcachedCache releases its client after every call"""
+        client = self.cache.pool.acquire()
+        self.cache.pool.release(client)
+        client.down = True
+        for call in (lambda: self.cache.get('key'),
+                     lambda: self.cache.set('key', 'value'),
+                     lambda: self.cache.delete('key')):
+            self.assertRaises(IOError, call)
+        client.down = False
+        for _ in range(3):
+            self.cache.set('key', 'value')
+            self.cache.get_many(['key'])
+        self.assertTrue(self.cache.pool.acquire() is client)
+        self.assertRaises(PoolTimeout, self.cache.get, 'key')
+
+    def test_thread_mapped(self):
+        """Testing MemcachedCache with a client per thread"""
+        cache = memcached.MemcachedCache(['127.0.0.1'], thread_mapped=True,
+                                         binary=True)
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        client = cache.pool.acquire()
+        self.assertTrue(cache.pool.acquire() is client)
+        self.assertEqual(client.kwargs, {'binary': True})
+
+    def test_serializer(self):
+        """Testing MemcachedCache with a Serializer"""
+        cache = memcached.MemcachedCache(
+            ['127.0.0.1'], serializer=Serializer(compress_threshold=100))
+        cache.set('key', 'x' * 1000)
+        data, flags, _ = Client.stores[('127.0.0.1',)]['key']
+        self.assertTrue(flags & memcached.SERIALIZER_FLAG)
+        self.assertTrue(len(data) < 1000)
+        self.assertEqual(cache.get('key'), 'x' * 1000)
+
+        # - the values of clients with and without a serializer can be
+        # read by both
+        self.assertEqual(self.cache.get('key'), 'x' * 1000)
+        self.cache.set('plain', {'a': 1})
+        self.assertEqual(cache.get('plain'), {'a': 1})
+
+    def test_expiry(self):
+        """Testing MemcachedCache sends long ttls as timestamps"""
+        expiry = memcached._expiry
+        self.assertEqual(expiry(None), 0)
+        self.assertEqual(expiry(0), 0)
+        self.assertEqual(expiry(1.5), 2)
+        self.assertEqual(expiry(memcached.MAX_RELATIVE_EXPIRY),
+                         memcached.MAX_RELATIVE_EXPIRY)
+        with mock.patch('time.time', return_value=1000):
+            self.assertEqual(expiry(memcached.MAX_RELATIVE_EXPIRY + 1),
+                             1001 + memcached.MAX_RELATIVE_EXPIRY)
+            self.cache.set('key', 'value', ttl=10)
+            self.cache.set_many({'a': 1}, ttl=60 * 24 * 3600)
+        store = Client.stores[('127.0.0.1',)]
+        self.assertEqual(store['key'][2], 10)
+        self.assertEqual(store['a'][2], 1000 + 60 * 24 * 3600)
+
+        # - the max_age in the config, unless given a ttl
+        self.cache.config['max_age'] = 300
+        self.cache.set('key', 'value')
+        self.cache.set_many({'a': 1})
+        self.assertEqual((store['key'][2], store['a'][2]), (300, 300))
+        self.cache.set('key', 'value', ttl=10)
+        self.assertEqual(store['key'][2], 10)
+
+    def test_key_allowed(self):
+        """Testing MemcachedCache rejects the keys memcached does not"""
+        self.assertTrue(self.cache.restricts_keys)
+        self.assertTrue(self.cache.key_allowed('key:1'))
+        self.assertTrue(self.cache.key_allowed('k' * 250))
+        self.assertTrue(self.cache.key_allowed(u'caf\xe9'))
+        self.assertFalse(self.cache.key_allowed('k' * 251))
+        self.assertFalse(self.cache.key_allowed(u'\xe9' * 126))
+        self.assertFalse(self.cache.key_allowed('with space'))
+        self.assertFalse(self.cache.key_allowed('with\nnewline'))
+        self.assertFalse(self.cache.key_allowed(b'\x7f'))
+
+    def test_from_url(self):
+        """Testing MemcachedCache configured with a URL"""
+        cache = memcached.MemcachedCache.from_url(urlsplit(
+            'memcached://10.0.0.1:11211,10.0.0.2:11211?pool=4'
+            '&pool_timeout=2.5&max_age=300'))
+        self.assertEqual(cache.servers, ['10.0.0.1:11211', '10.0.0.2:11211'])
+        self.assertEqual(cache.pool.size, 4)
+        self.assertEqual(cache.pool.timeout, 2.5)
+        self.assertEqual(cache.config, {'max_age': 300})
+        cache = memcached.MemcachedCache.from_url(urlsplit(
+            'memcached://10.0.0.1?thread_mapped=true'))
+        self.assertTrue(isinstance(cache.pool, memcached.ThreadMappedPool))
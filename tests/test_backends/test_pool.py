@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from supycache.backends.pool import BoundedPool, PoolTimeout, ThreadMappedPool
+
+
+class Client(object):
+    """A dummy client, counting the instances created"""
+    created = 0
+
+    def __init__(self):
+        Client.created += 1
+
+
+class TestBoundedPool(unittest.TestCase):
+    """ Test the BoundedPool of clients
+    """
+
+    def setUp(self):
+        Client.created = 0
+
+    def test_reuse(self):
+        """Testing BoundedPool reuses released clients"""
+        pool = BoundedPool(Client, size=2)
+        client = pool.acquire()
+        pool.release(client)
+        self.assertTrue(pool.acquire() is client)
+        self.assertEqual(Client.created, 1)
+
+    def test_timeout(self):
+        """Testing BoundedPool waits for a client up to the timeout"""
+        pool = BoundedPool(Client, size=2, timeout=0.01)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        timer = threading.Timer(0.01, pool.release, args=(first,))
+        timer.start()
+        pool.timeout = 5
+        self.assertTrue(pool.acquire() is first)
+        timer.join()
+        self.assertEqual(Client.created, 2)
+
+    def test_factory_errors(self):
+        """Testing BoundedPool errors while creating a client"""
+        def factory():
+            raise IOError()
+
+        pool = BoundedPool(factory, size=1)
+        with self.assertRaises(IOError):
+            pool.acquire()
+        pool.factory = Client
+        pool.acquire()
+        self.assertEqual(Client.created, 1)
+
+
+class TestThreadMappedPool(unittest.TestCase):
+    """ Test the ThreadMappedPool of clients
+    """
+
+    def test_one_client_per_thread(self):
+        """Testing ThreadMappedPool holds one client per thread"""
+        pool = ThreadMappedPool(Client)
+        client = pool.acquire()
+        pool.release(client)
+        self.assertTrue(pool.acquire() is client)
+
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(pool.acquire()))
+        thread.start()
+        thread.join()
+        self.assertFalse(clients[0] is client)
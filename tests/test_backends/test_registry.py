@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import supycache
+from supycache.backends import (DictCache, SQLiteCache, ShardedDictCache,
+                                backend_class, from_url, register_backend)
+
+
+class CustomCache(DictCache):
+    pass
+
+
+class TestRegistry(unittest.TestCase):
+    """Testing the backends configured with URLs
+    """
+
+    def test_memory(self):
+        backend = from_url('memory://?max_entries=100000&max_age=1.5'
+                           '&eviction_policy=lfu')
+        self.assertTrue(isinstance(backend, DictCache))
+        self.assertEqual(backend.config, {'max_entries': 100000,
+                                          'max_age': 1.5,
+                                          'eviction_policy': 'lfu'})
+
+    def test_sharded(self):
+        backend = from_url('sharded://?shards=4&max_entries=100')
+        self.assertTrue(isinstance(backend, ShardedDictCache))
+        self.assertEqual(len(backend._shards), 4)
+        self.assertEqual(backend.config, {'max_entries': 100})
+
+    def test_sqlite(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'cache.sqlite')
+        backend = from_url('sqlite://%s?timeout=1&max_entries=10' % path)
+        self.addCleanup(backend.close)
+        self.assertTrue(isinstance(backend, SQLiteCache))
+        self.assertEqual(backend.path, path)
+        self.assertEqual(backend.timeout, 1)
+        self.assertEqual(backend.config, {'max_entries': 10})
+
+    def test_unknown_scheme(self):
+        self.assertRaises(ValueError, from_url, 'nonexistent://')
+        self.assertRaises(ValueError, from_url, 'max_entries=10')
+
+    def test_register_backend(self):
+        register_backend('custom', CustomCache)
+        self.assertTrue(backend_class('custom') is CustomCache)
+        self.assertTrue(isinstance(from_url('custom://'), CustomCache))
+        register_backend('lazy', '%s:CustomCache' % __name__)
+        self.assertTrue(backend_class('lazy') is CustomCache)
+
+    def test_default_from_url(self):
+        previous = supycache.default_backend
+        self.addCleanup(supycache.set_default_backend, previous)
+        supycache.set_default_backend('memory://?max_entries=10')
+        self.assertEqual(supycache.get_default_backend().config,
+                         {'max_entries': 10})
+
+        @supycache.supycache(backend='memory://', cache_key='key')
+        def cached():
+            return 42
+
+        self.assertEqual(cached(), 42)
+
+    def test_lazy_imports(self):
+        """importing supycache does not import the backends' dependencies"""
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, supycache; print(" ".join(sys.modules))'])
+        modules = modules.decode('ascii').split()
+        for module in ('pylibmc', 'sqlite3', 'multiprocessing',
+                       'supycache.backends.memcached'):
+            self.assertFalse(module in modules, module)
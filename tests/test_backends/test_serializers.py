@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+import unittest
+from supycache.backends.serializers import Serializer, codecs
+
+
+class TestSerializer(unittest.TestCase):
+    """ Test the Serializer used by the memcached backend
+    """
+
+    value = {'users': [{'id': i, 'name': 'user-%d' % i} for i in range(100)]}
+
+    def test_uncompressed(self):
+        """Testing Serializer without compression"""
+        serializer = Serializer()
+        data = serializer.dumps(self.value)
+        self.assertEqual(data[0], 0)
+        self.assertEqual(serializer.protocol, min(5, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(serializer.loads(data), self.value)
+
+    def test_compressed(self):
+        """Testing Serializer compresses values above the threshold"""
+        for codec in codecs:
+            serializer = Serializer(compress_threshold=1024, codec=codec)
+            data = serializer.dumps(self.value)
+            self.assertEqual(data[0], codecs[codec].id)
+            self.assertTrue(len(data) < len(pickle.dumps(self.value)))
+            self.assertEqual(serializer.loads(data), self.value)
+
+            small = serializer.dumps('small')
+            self.assertEqual(small[0], 0)
+            self.assertEqual(serializer.loads(small), 'small')
+
+    def test_mixed_formats(self):
+        """Testing Serializer reads values written with any codec"""
+        written = [Serializer().dumps(self.value),
+                   Serializer(compress_threshold=0).dumps(self.value)]
+        reader = Serializer(compress_threshold=0, codec='lzma')
+        for data in written:
+            self.assertEqual(reader.loads(data), self.value)
+
+    def test_errors(self):
+        """Testing Serializer errors"""
+        with self.assertRaises(ValueError):
+            Serializer(codec='unknown')
+        with self.assertRaises(ValueError):
+            Serializer().loads(b'\xff' + pickle.dumps(self.value))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+import supycache
+
+
+class TestShardedDictCache(unittest.TestCase):
+    """ Test the ShardedDictCache backend
+    """
+
+    def setUp(self):
+        self.cache = supycache.backends.ShardedDictCache(shards=4)
+        supycache.set_default_backend(self.cache)
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_methods(self):
+        """Testing ShardedDictCache methods"""
+        for i in range(100):
+            self.cache.set('key-%d' % i, i)
+        self.assertEqual(len(self.cache), 100)
+        self.assertEqual(self.cache.get('key-42'), 42)
+        self.assertFalse(bool(self.cache.get('non-existent')))
+        self.cache.delete('key-42')
+        self.assertFalse(bool(self.cache.get('key-42')))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_config(self):
+        """Testing ShardedDictCache shards share the config"""
+        cache = supycache.backends.ShardedDictCache(
+            config={'max_entries': 10}, shards=4)
+
+        @supycache.supycache(backend=cache, cache_key='{0}', max_age=10)
+        def simple_function(key):
+            return key
+
+        for i in range(100):
+            simple_function('key-%d' % i)
+        self.assertTrue(len(cache) <= 12)
+
+    def test_threads(self):
+        """Testing ShardedDictCache from multiple threads"""
+        cache = supycache.backends.ShardedDictCache(
+            config={'max_age': 10, 'max_entries': 64}, shards=4)
+
+        def worker(offset):
+            for i in range(2000):
+                key = 'key-%d' % ((i + offset) % 100)
+                if cache.get(key) is None:
+                    cache.set(key, i)
+                if i % 7 == 0:
+                    try:
+                        cache.delete(key)
+                    except KeyError:
+                        pass
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(len(cache) <= 64)
+
+    def test_many(self):
+        """Testing ShardedDictCache get_many(), set_many() and delete_many()"""
+        self.cache.set_many(dict(('key-%d' % i, i) for i in range(20)))
+        self.assertEqual(self.cache.get_many(['key-1', 'key-7', 'missing']),
+                         {'key-1': 1, 'key-7': 7})
+        self.cache.delete_many(['key-%d' % i for i in range(10)])
+        self.assertEqual(len(self.cache), 10)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import unittest
+from unittest import mock
+from supycache.backends import SharedMemoryCache
+
+
+def write_values(cache, start, count):
+    for i in range(start, start + count):
+        cache.set('key_%d' % i, [i] * 10)
+
+
+class TestSharedMemoryCache(unittest.TestCase):
+    """ Test the SharedMemoryCache backend
+    """
+
+    def setUp(self):
+        self.cache = SharedMemoryCache(buckets=256, ways=4, slot_size=256)
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache.unlink()
+
+    def test_methods(self):
+        """Testing SharedMemoryCache methods"""
+        self.cache.set('key', {'some': ['value']})
+        self.assertEqual(self.cache.get('key'), {'some': ['value']})
+        self.cache.set('key', 'other value')
+        self.assertEqual(self.cache.get('key'), 'other value')
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.cache.set('none', None)
+        self.assertEqual(self.cache.get('none', 'default'), None)
+        self.assertEqual(len(self.cache), 2)
+        self.cache.delete('key')
+        self.assertEqual(self.cache.get('key'), None)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_too_large(self):
+        """Testing SharedMemoryCache rejects values larger than a slot"""
+        with self.assertRaises(ValueError):
+            self.cache.set('key', 'x' * 256)
+        self.assertEqual(self.cache.get('key'), None)
+
+    def test_ttl(self):
+        """Testing SharedMemoryCache expiry of values"""
+        self.cache.config['max_age'] = 10
+        with mock.patch('time.time', return_value=1000):
+            self.cache.set('aged', 'value')
+            self.cache.set('short', 'value', ttl=1)
+        with mock.patch('time.time', return_value=1005):
+            self.assertEqual(self.cache.get('aged'), 'value')
+            self.assertEqual(self.cache.get('short'), None)
+        with mock.patch('time.time', return_value=1011):
+            self.assertEqual(self.cache.get('aged'), None)
+
+    def test_eviction(self):
+        """Testing SharedMemoryCache evicts the oldest value of a full bucket
+        """
+        cache = SharedMemoryCache(buckets=1, ways=4, slot_size=128)
+        try:
+            for i in range(4):
+                with mock.patch('time.time', return_value=1000 + i):
+                    cache.set('key_%d' % i, i)
+            with mock.patch('time.time', return_value=1010):
+                cache.set('key_4', 4)
+            self.assertEqual(len(cache), 4)
+            self.assertEqual(cache.get('key_0'), None)
+            self.assertEqual([cache.get('key_%d' % i) for i in range(1, 5)],
+                             [1, 2, 3, 4])
+        finally:
+            cache.close()
+            cache.unlink()
+
+    def test_processes(self):
+        """Testing SharedMemoryCache shared by several processes"""
+        for method in ('fork', 'spawn'):
+            context = multiprocessing.get_context(method)
+            cache = SharedMemoryCache(buckets=256, ways=4, slot_size=256,
+                                      context=context)
+            try:
+                processes = [context.Process(target=write_values,
+                                             args=(cache, i * 50, 50))
+                             for i in range(4)]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                self.assertTrue(all(process.exitcode == 0
+                                    for process in processes))
+                self.assertEqual(len(cache), 200)
+                self.assertEqual(cache.get('key_199'), [199] * 10)
+            finally:
+                cache.close()
+                cache.unlink()
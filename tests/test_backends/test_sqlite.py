@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import supycache
+from supycache.backends import SQLiteCache
+
+
+def write_values(path, start, count):
+    cache = SQLiteCache(path)
+    for i in range(start, start + count):
+        cache.set('key_%d' % i, i)
+
+
+class TestSQLiteCache(unittest.TestCase):
+    """ Test the SQLiteCache backend
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+        self.cache = SQLiteCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_methods(self):
+        """Testing SQLiteCache methods"""
+        self.cache.set('key', {'some': ['value']})
+        self.assertEqual(self.cache.get('key'), {'some': ['value']})
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.cache.set('false', None)
+        self.assertEqual(self.cache.get('false', 'default'), None)
+        self.cache.delete('key')
+        self.assertEqual(self.cache.get('key'), None)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_persistence(self):
+        """Testing SQLiteCache values outlive the backend instance"""
+        self.cache.set('key', 'value')
+        self.cache.close()
+        self.assertEqual(SQLiteCache(self.path).get('key'), 'value')
+
+    def test_batches(self):
+        """Testing SQLiteCache get_many/set_many/delete_many"""
+        values = dict(('key_%d' % i, i) for i in range(1200))
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(list(values) + ['missing']),
+                         values)
+        self.cache.delete_many(['key_%d' % i for i in range(1000)])
+        self.assertEqual(len(self.cache), 200)
+
+    def test_ttl(self):
+        """Testing SQLiteCache expiry of values"""
+        cache = SQLiteCache(self.path, config={'max_age': 10})
+        with mock.patch('time.time', return_value=1000):
+            cache.set('aged', 'value')
+            cache.set('short', 'value', ttl=1)
+        with mock.patch('time.time', return_value=1005):
+            self.assertEqual(cache.get('aged'), 'value')
+            self.assertEqual(cache.get('short'), None)
+            self.assertEqual(cache.get_many(['aged', 'short']),
+                             {'aged': 'value'})
+            cache.purge()
+            self.assertEqual(len(cache), 1)
+        with mock.patch('time.time', return_value=1011):
+            self.assertEqual(cache.get('aged'), None)
+        cache.close()
+
+    def test_max_entries(self):
+        """Testing SQLiteCache evicts the values written least recently"""
+        cache = SQLiteCache(self.path, config={'max_entries': 10})
+        cache.purge_interval = 5
+        for i in range(20):
+            cache.set('key_%d' % i, i)
+        self.assertEqual(len(cache), 10)
+        cache.set('key_10', 10)     # - rewriting makes key_10 the newest
+        cache.set_many(dict(('new_%d' % i, i) for i in range(4)))
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache.get('key_10'), 10)
+        self.assertEqual(cache.get('key_11'), None)
+        cache.close()
+
+    def test_processes(self):
+        """Testing SQLiteCache shared by several processes"""
+        processes = [multiprocessing.Process(target=write_values,
+                                             args=(self.path, i * 100, 100))
+                     for i in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertTrue(all(process.exitcode == 0 for process in processes))
+        self.assertEqual(len(self.cache), 400)
+        self.assertEqual(self.cache.get('key_399'), 399)
+
+    def test_decorator(self):
+        """Testing SQLiteCache as the default backend"""
+        supycache.set_default_backend(self.cache)
+        calls = []
+
+        @supycache.supycache(cache_key='sum_{0}_{1}')
+        def cached_sum(x, y):
+            calls.append((x, y))
+            return x + y
+
+        self.assertEqual(cached_sum(28, 14), 42)
+        self.assertEqual(cached_sum(28, 14), 42)
+        self.assertEqual(calls, [(28, 14)])
+        self.assertEqual(self.cache.get('sum_28_14'), 42)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from supycache.backends import DictCache, TaggedCache
+from supycache.backends.tagged import TaggedKey, invalidate_tags, tag_key
+
+
+class LegacyCache(object):
+    """A backend that does not derive from BaseCache"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        del self.data[key]
+
+
+class TestTaggedCache(unittest.TestCase):
+    """ Test the TaggedCache backend
+    """
+
+    def setUp(self):
+        self.backend = DictCache()
+        self.cache = TaggedCache(self.backend)
+
+    def test_methods(self):
+        """Testing TaggedCache with and without tagged keys"""
+        self.cache.set('plain', 'value')
+        self.assertEqual(self.cache.get('plain'), 'value')
+        self.assertEqual(self.backend.get('plain'), 'value')
+
+        key = TaggedKey('key', ['user:1', 'all'])
+        self.assertEqual(self.cache.get(key, 'default'), 'default')
+        self.cache.set(key, 'value')
+        self.assertEqual(self.cache.get(TaggedKey('key', ['user:1', 'all'])),
+                         'value')
+        self.assertTrue(self.backend.get(tag_key('user:1')))
+        self.cache.delete(key)
+        self.assertEqual(self.cache.get(key), None)
+
+    def test_invalidate(self):
+        """Testing TaggedCache invalidation of tags"""
+        for user in (1, 2):
+            for name in ('profile', 'friends'):
+                self.cache.set(TaggedKey('%s:%d' % (name, user),
+                                         ['user:%d' % user]), name)
+
+        invalidate_tags(self.backend, ['user:1'])
+        self.assertEqual(self.cache.get(TaggedKey('profile:1', ['user:1'])),
+                         None)
+        self.assertEqual(self.cache.get_many([
+            TaggedKey('%s:%d' % (name, user), ['user:%d' % user])
+            for user in (1, 2) for name in ('profile', 'friends')]),
+            {'profile:2': 'profile', 'friends:2': 'friends'})
+
+        # - an evicted generation is as good as an invalidated one
+        self.backend.delete(tag_key('user:2'))
+        self.assertEqual(self.cache.get(TaggedKey('profile:2', ['user:2'])),
+                         None)
+
+    def test_invalidate_while_computing(self):
+        """Testing TaggedCache stores the generations read before a miss"""
+        key = TaggedKey('key', ['tag'])
+        self.cache.set(TaggedKey('other', ['tag']), 'value')
+        self.assertEqual(self.cache.get(key), None)
+        invalidate_tags(self.backend, ['tag'])
+        self.cache.set(key, 'stale value')
+        self.assertEqual(self.cache.get(TaggedKey('key', ['tag'])), None)
+
+    def test_many(self):
+        """Testing TaggedCache get_many/set_many"""
+        keys = [TaggedKey('key:%d' % i, ['tag:%d' % (i % 2)])
+                for i in range(4)]
+        self.cache.set_many(dict((key, i) for i, key in enumerate(keys)))
+        invalidate_tags(self.backend, ['tag:0'])
+        self.assertEqual(self.cache.get_many(keys + ['missing']),
+                         {'key:1': 1, 'key:3': 3})
+
+    def test_legacy_backend(self):
+        """Testing TaggedCache in front of a backend without get_many"""
+        cache = TaggedCache(LegacyCache())
+        key = TaggedKey('key', ['tag'])
+        cache.set(key, 'value')
+        self.assertEqual(cache.get(TaggedKey('key', ['tag'])), 'value')
+        invalidate_tags(cache.backend, ['tag'])
+        self.assertEqual(cache.get(TaggedKey('key', ['tag']), 'miss'), 'miss')
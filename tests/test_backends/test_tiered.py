@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+import supycache
+
+
+class CountingCache(supycache.backends.DictCache):
+    """A DictCache that counts the calls to get()"""
+
+    def __init__(self, config=None):
+        super(CountingCache, self).__init__(config)
+        self.gets = 0
+
+    def get(self, key, default=None):
+        self.gets += 1
+        return super(CountingCache, self).get(key, default)
+
+
+class TestTieredCache(unittest.TestCase):
+    """ Test the TieredCache backend
+    """
+
+    def setUp(self):
+        self.remote = CountingCache()
+        self.cache = supycache.backends.TieredCache(self.remote, l1_ttl=5)
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_read_through(self):
+        """Testing TieredCache reads through to the remote backend"""
+        self.remote.set('key', 'value')
+        with mock.patch('time.time', return_value=1000):
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.remote.gets, 1)
+
+        # - remote changes are seen once the l1_ttl has passed
+        self.remote.set('key', 'changed')
+        with mock.patch('time.time', return_value=1004):
+            self.assertEqual(self.cache.get('key'), 'value')
+        with mock.patch('time.time', return_value=1006):
+            self.assertEqual(self.cache.get('key'), 'changed')
+        self.assertTrue(self.cache.get('non-existent') is None)
+
+    def test_write_through(self):
+        """Testing TieredCache writes and deletes go to both tiers"""
+        self.cache.set('key', 'value', ttl=60)
+        self.assertEqual(self.remote.get('key'), 'value')
+        self.assertEqual(self.cache.local.get('key'), 'value')
+        self.cache.delete('key')
+        self.assertTrue(self.remote.get('key') is None)
+        self.assertTrue(self.cache.local.get('key') is None)
+
+    def test_many(self):
+        """Testing TieredCache get_many(), set_many() and delete_many()"""
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.remote.set('c', 3)
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c', 'd']),
+                         {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(self.cache.local.get('c'), 3)
+        self.cache.delete_many(['a', 'c'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'b': 2})
+
+    def test_decorator(self):
+        """Testing TieredCache as the backend of a decorator"""
+        @supycache.supycache(backend=self.cache, cache_key='{0}', max_age=10)
+        def simple_function(key):
+            return 'cached_value'
+
+        with mock.patch('time.time', return_value=1000):
+            simple_function('key')
+            simple_function('key')
+        # - max_age is passed on to the remote backend as the ttl
+        self.assertEqual(self.remote.data['key'], ('cached_value', 1010))
+        self.assertNotIn('max_age', self.remote.config)
+        self.assertEqual(self.remote.gets, 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+import supycache
+from supycache.backends import DictCache
+from supycache.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FailingCache(DictCache):
+
+    def __init__(self, *args, **kwargs):
+        super(FailingCache, self).__init__(*args, **kwargs)
+        self.down = False
+        self.calls = 0
+
+    def get(self, key, default=None):
+        self.calls += 1
+        if self.down:
+            raise IOError('cache is down')
+        return super(FailingCache, self).get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.calls += 1
+        if self.down:
+            raise IOError('cache is down')
+        return super(FailingCache, self).set(key, value, ttl)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Testing the circuit breaker states
+    """
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=10)
+        for _ in range(2):
+            breaker.failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.success()
+        self.assertEqual(breaker.failures, 0)
+        for _ in range(3):
+            breaker.failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.info()['trips'], 1)
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=10)
+        with mock.patch('time.time', return_value=1000):
+            breaker.failure()
+        with mock.patch('time.time', return_value=1005):
+            self.assertFalse(breaker.allow())
+        with mock.patch('time.time', return_value=1011):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, HALF_OPEN)
+            # - just one probe at a time
+            self.assertFalse(breaker.allow())
+            breaker.failure()
+            self.assertEqual(breaker.state, OPEN)
+        with mock.patch('time.time', return_value=1022):
+            self.assertTrue(breaker.allow())
+            breaker.success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_slow_calls_fail(self):
+        breaker = CircuitBreaker(failure_threshold=2, timeout=0.1)
+        breaker.success(0.05)
+        breaker.success(0.5)
+        breaker.success(0.5)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_breaker_states(self):
+        breaker = CircuitBreaker(failure_threshold=1, name='test_states')
+        breaker.failure()
+        states = supycache.breaker_states()
+        self.assertEqual(states['test_states']['state'], OPEN)
+
+
+class TestCircuitBreakerDecorator(unittest.TestCase):
+    """ caching with a circuit breaker around the backend
+    """
+
+    def test_open_breaker_skips_backend(self):
+        backend = FailingCache()
+        calls = []
+
+        @supycache.supycache(backend=backend, cache_key='result',
+                             circuit_breaker=CircuitBreaker(
+                                 failure_threshold=2, cooldown=10))
+        def cached():
+            calls.append(1)
+            return 42
+
+        backend.down = True
+        with mock.patch('time.time', return_value=1000):
+            self.assertEqual(cached(), 42)   # - get and set fail
+            self.assertEqual(cached.circuit_breaker.state, OPEN)
+            self.assertEqual(backend.calls, 2)
+            self.assertEqual(cached(), 42)
+            self.assertEqual(backend.calls, 2)
+            self.assertEqual(len(calls), 2)
+
+        backend.down = False
+        with mock.patch('time.time', return_value=1011):
+            self.assertEqual(cached(), 42)   # - the probe closes the breaker
+            self.assertEqual(cached.circuit_breaker.state, CLOSED)
+            self.assertEqual(cached(), 42)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(cached.cache_info().hits, 1)
+
+    def test_open_breaker_does_not_raise(self):
+        backend = FailingCache()
+        backend.down = True
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        @supycache.supycache(backend=backend, cache_key='result',
+                             circuit_breaker=breaker, ignore_errors=False)
+        def cached():
+            return 42
+
+        self.assertRaises(IOError, cached)
+        self.assertEqual(cached(), 42)
+
+    def test_shared_breaker(self):
+        backend = FailingCache()
+
+        @supycache.supycache(backend=backend, cache_key='a',
+                             circuit_breaker=True)
+        def a():
+            return 1
+
+        @supycache.supycache(backend=backend, expire_key='a',
+                             circuit_breaker=True)
+        def b():
+            return 2
+
+        self.assertTrue(a.circuit_breaker is b.circuit_breaker)
+        self.assertTrue(
+            supycache.supycache(cache_key='c')(lambda: 3).circuit_breaker
+            is None)
+
+    def test_invalid_breaker(self):
+        self.assertRaises(ValueError, supycache.supycache(
+            cache_key='a', circuit_breaker='yes'), lambda: 1)
+
+    def test_missing_keys_are_not_failures(self):
+        backend = DictCache()
+
+        @supycache.supycache(backend=backend, expire_key='{0}',
+                             circuit_breaker=True)
+        def expire(key):
+            return key
+
+        for key in range(10):
+            expire(key)
+        self.assertEqual(expire.circuit_breaker.state, CLOSED)
+        self.assertEqual(expire.circuit_breaker.failures, 0)
+        self.assertEqual(expire.cache_info().errors, 0)
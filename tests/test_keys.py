@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from supycache.keys import auto_key, bound_key, compile_key, digest_key
+
+
+class DummyArg:
+    def __init__(self, value):
+        self.name = value
+
+
+class TestCompileKey(unittest.TestCase):
+    """ Test the compiled cache_key/expire_key templates
+    """
+
+    def assertSameAsFormat(self, template, *args, **kwargs):
+        self.assertEqual(compile_key(template)(*args, **kwargs),
+                         template.format(*args, **kwargs))
+
+    def test_callable(self):
+        """callable keys are used as-is"""
+        func = lambda *args, **kwargs: 'key'
+        self.assertTrue(compile_key(func) is func)
+
+    def test_constant(self):
+        """constant keys"""
+        self.assertEqual(compile_key('simple_key')(1, x=2), 'simple_key')
+        self.assertEqual(compile_key('{{escaped}}')(), '{escaped}')
+        self.assertEqual(compile_key('100%')(), '100%')
+
+    def test_positional_and_keyword(self):
+        """keys built from positional and keyword arguments"""
+        self.assertSameAsFormat('{0}', 'key', 1)
+        self.assertSameAsFormat('{0}_{keyword}', 'some', 1, keyword='key')
+        self.assertSameAsFormat('{}_{}', 'some', 'key')
+        self.assertSameAsFormat('%s_{1}%%', 'some', 'key')
+
+    def test_lookups(self):
+        """keys built from attributes and items within arguments"""
+        self.assertSameAsFormat('{0}_{arglist[0]}', 'some', arglist=['key'])
+        self.assertSameAsFormat('{0}_{argdict[lookup]}', 'some',
+                                argdict={'lookup': 'key'})
+        self.assertSameAsFormat('{0}_{arg.name}', 'some', arg=DummyArg('key'))
+        self.assertSameAsFormat('{0.name[1]}', DummyArg('xyz'))
+        keyword_arg = DummyArg('key')
+        setattr(keyword_arg, 'class', 'keyword')
+        self.assertSameAsFormat('{0.class}_{0.name}', keyword_arg)
+
+    def test_conversions_and_specs(self):
+        """keys with conversions and format specs"""
+        self.assertSameAsFormat('{0!r}_{1:>5}_{2!s:.2}', 'some', 42, 'key')
+        self.assertSameAsFormat('{0:{1}}', 42, '>5')
+
+    def test_errors(self):
+        """errors are raised at call time, like str.format() would"""
+        with self.assertRaises(IndexError):
+            compile_key('{0}_{1}')('some')
+        with self.assertRaises(KeyError):
+            compile_key('{keyword}')('some')
+        with self.assertRaises(ValueError):
+            compile_key('{}_{0}')('some')
+        with self.assertRaises(ValueError):
+            compile_key('unbalanced}')()
+
+
+class TestBoundKey(unittest.TestCase):
+    """ Test the digests of keys the backends do not allow
+    """
+
+    def test_digest_key(self):
+        """digests keep a readable, safe prefix"""
+        key = 'some key\twith spaces ' + 'x' * 1000
+        digest = digest_key(key)
+        self.assertTrue(digest.startswith('some_key_with_spaces_xxxxxxxxxxx#'))
+        self.assertEqual(len(digest), 32 + 1 + 32)
+        self.assertEqual(digest_key(key), digest)
+        self.assertNotEqual(digest_key(key + 'x'), digest)
+        self.assertEqual(len(digest_key(key, prefix_length=0)), 32)
+        self.assertEqual(digest_key(b'bytes'), digest_key('bytes'))
+
+    def test_bound_key(self):
+        """keys are digested only when not allowed"""
+        short = lambda key: len(key) <= 10
+        build_key = bound_key(compile_key('{0}'), short)
+        self.assertEqual(build_key('short'), 'short')
+        self.assertEqual(build_key('a' * 11), digest_key('a' * 11))
+
+        build_key = bound_key(compile_key('{0}'), short, namespace='ns:')
+        self.assertEqual(build_key('short'), 'ns:short')
+        self.assertEqual(build_key('shorter!'), 'ns:' + digest_key('shorter!'))
+
+
+class TestAutoKey(unittest.TestCase):
+    """ Test the keys built from all the arguments of a function
+    """
+
+    def test_binding(self):
+        """arguments are bound to the parameters, with their defaults"""
+        def function(a, b=2, *, c=3):
+            pass
+
+        build_key = auto_key(function)
+        key = build_key(1)
+        self.assertTrue(key.startswith(function.__module__ +
+                                       '.TestAutoKey.test_binding.'
+                                       '<locals>.function:'))
+        for args, kwargs in [((1, 2), {}), ((), {'a': 1}),
+                             ((1,), {'c': 3, 'b': 2})]:
+            self.assertEqual(build_key(*args, **kwargs), key)
+        self.assertNotEqual(build_key(1, 3), key)
+        self.assertNotEqual(build_key(1.0), key)
+        with self.assertRaises(TypeError):
+            build_key()
+        with self.assertRaises(TypeError):
+            build_key(1, d=4)
+
+    def test_method(self):
+        """methods are keyed on the arguments after the instance"""
+        def method(self, a, b=2):
+            pass
+
+        build_key = auto_key(method, method=True)
+        self.assertEqual(build_key(1), build_key(a=1, b=2))
+        self.assertNotEqual(build_key(1), build_key(2))
+        with self.assertRaises(TypeError):
+            build_key(1, 2, 3)
+
+    def test_unhashable(self):
+        """unhashable and unordered arguments"""
+        build_key = auto_key(lambda *args, **kwargs: None)
+        self.assertEqual(build_key([1, {'a': 1, 'b': {2, 3}}], x=[]),
+                         build_key([1, {'b': {3, 2}, 'a': 1}], x=[]))
+        self.assertNotEqual(build_key([1]), build_key((1,)))
+        self.assertEqual(build_key(DummyArg('steve')),
+                         build_key(DummyArg('steve')))
+        self.assertNotEqual(build_key(DummyArg('steve')),
+                            build_key(DummyArg('bob')))
+        with self.assertRaises(TypeError):
+            build_key(lambda: None)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import importlib
 import unittest
 import supycache
 
@@ -32,7 +33,7 @@ class TestDictCache(unittest.TestCase):
 
 def test_get_set_default_backend():
     """Testing get/set default_backend"""
-    reload(supycache) # - re-init
+    importlib.reload(supycache) # - re-init
     from supycache.backends import DictCache
     assert(supycache.default_backend == None)
     assert(isinstance(supycache.get_default_backend(), DictCache))
@@ -55,14 +56,26 @@ class TestCacheDecorators(unittest.TestCase):
         self.backend.clear()
 
     def test_missing_options(self):
-        """ missing option
+        """ missing key options, keys are built from all the arguments
         """
-        with self.assertRaises(KeyError) as context:
-            @supycache.supycache()
-            def simple_function():
-                return 'dummy'
-
-        self.assertTrue('expecting one of' in context.exception.message)
+        calls = []
+
+        @supycache.supycache()
+        def simple_function(positional, keyword=None, *args, **kwargs):
+            calls.append(positional)
+            return 'dummy'
+
+        simple_function(['unhashable'], {'dict': {1, 2}})
+        simple_function(['unhashable'], keyword={'dict': {2, 1}})
+        simple_function(positional=['unhashable'], keyword={'dict': {1, 2}})
+        self.assertEqual(len(calls), 1)
+        simple_function(['unhashable'])
+        simple_function(['unhashable'], None, 'extra')
+        simple_function(['unhashable'], None, extra=True)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(self.backend.data), 4)
+        self.assertTrue(all(key.startswith(__name__) for key in
+                            self.backend.data))
 
 
     def test_do_not_ignore_errors(self):
@@ -103,6 +116,9 @@ class TestCacheDecorators(unittest.TestCase):
             backend.delete = backend.raise_exc
             simple_function()
 
+        # - only the errors that are ignored are counted
+        self.assertEqual(simple_function.cache_info().errors, 0)
+
 
     def test_decorator_for_cache_key_cache_miss(self):
         """ caching a simple key on a cache miss
@@ -302,3 +318,544 @@ class TestCacheDecorators(unittest.TestCase):
 
         simple_expiry('simple_key', 'dummy')
         self.assertFalse(bool(self.backend.get('simple_key')))
+
+
+    def test_decorator_for_cache_key_single_flight(self):
+        """ concurrent cache misses for a key call the function once
+        """
+        import threading
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        @supycache.supycache(cache_key='{0}', single_flight=True)
+        def simple_function(key):
+            calls.append(key)
+            started.set()
+            release.wait()
+            return '%d:cached_value' % len(calls)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(simple_function('key')))
+                   for _ in range(10)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, ['key'])
+        self.assertEqual(results, ['1:cached_value'] * 10)
+        self.assertTrue(self.backend.get('key') == '1:cached_value')
+
+    def test_decorator_for_cache_key_single_flight_errors(self):
+        """ concurrent cache misses for a key share the exception raised
+        """
+        import threading
+        started = threading.Event()
+        release = threading.Event()
+
+        class TestException(Exception):
+            pass
+
+        @supycache.supycache(cache_key='simple_key', single_flight=True)
+        def simple_function():
+            started.set()
+            release.wait()
+            raise TestException()
+
+        errors = []
+        def call():
+            try:
+                simple_function()
+            except TestException as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 5)
+        self.assertFalse(bool(self.backend.get('simple_key')))
+
+    def test_decorator_for_cache_key_stale_while_revalidate(self):
+        """ serving stale values while refreshing them in the background
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest import mock
+
+        calls = []
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        @supycache.supycache(cache_key='simple_key', max_age=10,
+                             stale_while_revalidate=5,
+                             refresh_executor=executor)
+        def simple_function():
+            calls.append(1)
+            return '%d:cached_value' % len(calls)
+
+        with mock.patch('time.time', return_value=1000):
+            self.assertEqual(simple_function(), '1:cached_value')
+            self.assertEqual(self.backend.get_entry('simple_key'),
+                             ('1:cached_value', 1010))
+
+        with mock.patch('time.time', return_value=1012):
+            # - stale, returned while being refreshed
+            self.assertEqual(simple_function(), '1:cached_value')
+            executor.shutdown(wait=True)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(simple_function(), '2:cached_value')
+
+        with mock.patch('time.time', return_value=1030):
+            # - past the grace window, recomputed before returning
+            self.assertEqual(simple_function(), '3:cached_value')
+
+        with self.assertRaises(ValueError):
+            supycache.supycache(cache_key='simple_key',
+                                stale_while_revalidate=5)(simple_function)
+
+        class LegacyCache(object):
+            config = {}
+
+            def get(self, key):
+                pass
+
+            def set(self, key, value):
+                pass
+
+            def delete(self, key):
+                pass
+
+        with self.assertRaises(ValueError):
+            supycache.supycache(backend=LegacyCache(), cache_key='simple_key',
+                                max_age=10, stale_while_revalidate=5)(
+                simple_function)
+
+    def test_decorator_for_cache_key_false_values(self):
+        """ caching false values returned by the function
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='{0}')
+        def simple_function(key, value):
+            calls.append(key)
+            return value
+
+        for key, value in (('zero', 0), ('list', []), ('dict', {}), ('str', '')):
+            self.assertEqual(simple_function(key, value), value)
+            self.assertEqual(simple_function(key, 'changed'), value)
+        self.assertEqual(calls, ['zero', 'list', 'dict', 'str'])
+
+    def test_decorator_for_cache_key_negative_ttl(self):
+        """ caching None only when a negative_ttl is given
+        """
+        from unittest import mock
+
+        calls = []
+
+        @supycache.supycache(cache_key='{0}')
+        def simple_function(key):
+            calls.append(key)
+
+        @supycache.supycache(cache_key='negative_{0}', negative_ttl=5)
+        def negative_function(key):
+            calls.append('negative_' + key)
+
+        simple_function('key')
+        simple_function('key')
+        self.assertEqual(calls, ['key', 'key'])
+        self.assertFalse('key' in self.backend.data)
+
+        del calls[:]
+        with mock.patch('time.time', return_value=1000):
+            negative_function('key')
+            negative_function('key')
+            self.assertEqual(calls, ['negative_key'])
+            self.assertEqual(self.backend.data['negative_key'], (None, 1005))
+        with mock.patch('time.time', return_value=1006):
+            negative_function('key')
+            self.assertEqual(calls, ['negative_key', 'negative_key'])
+
+        class LegacyCache(object):
+            config = {}
+
+            def get(self, key):
+                pass
+
+            def set(self, key, value):
+                pass
+
+            def delete(self, key):
+                pass
+
+        self.assertRaises(ValueError, supycache.supycache(
+            backend=LegacyCache(), cache_key='{0}', negative_ttl=5),
+            simple_function)
+
+    def test_decorator_for_cache_key_batched(self):
+        """ caching the results for a list of items, one key per item
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='user:{0}:{1}', batched=True)
+        def get_users(ids, suffix):
+            calls.append(list(ids))
+            return dict((i, '%s_%s' % (i, suffix)) for i in ids)
+
+        self.assertEqual(get_users([1, 2], 'x'), {1: '1_x', 2: '2_x'})
+        self.assertEqual(self.backend.get('user:1:x'), '1_x')
+        self.assertEqual(get_users([3, 2, 1], 'x'),
+                         {3: '3_x', 2: '2_x', 1: '1_x'})
+        self.assertEqual(list(get_users([3, 2, 1], 'x')), [3, 2, 1])
+        self.assertEqual(calls, [[1, 2], [3]])
+
+        @supycache.supycache(cache_key='square:{0}', batched=True)
+        def get_squares(numbers):
+            calls.append(list(numbers))
+            return [number * number for number in numbers]
+
+        self.assertEqual(get_squares([2, 3]), {2: 4, 3: 9})
+        self.assertEqual(get_squares([3, 4]), {3: 9, 4: 16})
+        self.assertEqual(calls[2:], [[2, 3], [4]])
+
+    def test_decorator_cache_info(self):
+        """ counting hits, misses and errors of a decorated function
+        """
+        import threading
+
+        @supycache.supycache(cache_key='info:{0}')
+        def counted_function(key):
+            return 'value_%s' % key
+
+        counted_function('a')
+        counted_function('a')
+        threads = [threading.Thread(target=counted_function, args=('b',))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        info = counted_function.cache_info()
+        self.assertEqual(info.hits + info.misses, 6)
+        self.assertEqual(info.misses, 6 - info.hits)
+        self.assertTrue(info.misses >= 2)
+        self.assertEqual(info.errors, 0)
+        self.assertEqual(info.backend_calls, 6 + info.misses)
+        self.assertTrue(info.backend_time > 0 and info.compute_time > 0)
+        # - the counters of the threads that exited are added up
+        stats = counted_function.cache_info.__self__
+        self.assertEqual(len(stats._all_counters), 1)
+
+        name = __name__ + '.TestCacheDecorators.' \
+            'test_decorator_cache_info.<locals>.counted_function'
+        self.assertEqual(supycache.cache_stats()[name], info)
+
+        counted_function.cache_stats_reset()
+        self.assertEqual(tuple(counted_function.cache_info()),
+                         (0, 0, 0, 0, 0.0, 0.0))
+
+        from supycache.backends import DictCache
+
+        class FailingBackend(DictCache):
+            def get(self, key, default=None):
+                raise IOError()
+
+        @supycache.supycache(cache_key='info', backend=FailingBackend())
+        def failing_function():
+            return 'value'
+
+        failing_function()
+        self.assertEqual(failing_function.cache_info()[:3], (0, 1, 1))
+
+    def test_decorator_for_cache_key_tags(self):
+        """ invalidating all the results cached with a tag
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='profile:{user_id}',
+                             tags=['user:{user_id}'])
+        def get_profile(user_id):
+            calls.append(('profile', user_id))
+            return 'profile_%d' % user_id
+
+        @supycache.supycache(cache_key='friends:{0}', tags=['user:{0}'])
+        def get_friends(user_id):
+            calls.append(('friends', user_id))
+            return 'friends_%d' % user_id
+
+        @supycache.supycache(expire_tags=['user:{user_id}'])
+        def update_user(user_id):
+            calls.append(('update', user_id))
+
+        for _ in range(2):
+            for user_id in (1, 2):
+                get_profile(user_id=user_id)
+                get_friends(user_id)
+        self.assertEqual(len(calls), 4)
+
+        update_user(user_id=1)
+        self.assertEqual(get_profile(user_id=1), 'profile_1')
+        self.assertEqual(get_friends(1), 'friends_1')
+        get_profile(user_id=2)
+        get_friends(2)
+        self.assertEqual(calls[4:], [('update', 1), ('profile', 1),
+                                     ('friends', 1)])
+
+        supycache.invalidate_tags('user:2')
+        get_friends(2)
+        self.assertEqual(calls[7:], [('friends', 2)])
+
+    def test_decorator_for_cache_key_namespaced_tags(self):
+        """ invalidating namespaced and digested tags
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='profile:{0}', tags=['user:{0}'],
+                             key_namespace='app:')
+        def get_profile(user_id):
+            calls.append(user_id)
+            return 'profile_%d' % user_id
+
+        @supycache.supycache(cache_key='friends:{0}', tags=['user:{0}'],
+                             hash_keys=True)
+        def get_friends(user_id):
+            calls.append(user_id)
+            return 'friends_%d' % user_id
+
+        get_profile(1)
+        get_friends(1)
+        supycache.invalidate_tags('user:1')
+        get_profile(1)
+        get_friends(1)
+        self.assertEqual(len(calls), 2)
+        supycache.invalidate_tags('user:1', key_namespace='app:')
+        get_profile(1)
+        get_friends(1)
+        self.assertEqual(len(calls), 3)
+        supycache.invalidate_tags('user:1', hash_keys=True)
+        get_profile(1)
+        get_friends(1)
+        self.assertEqual(len(calls), 4)
+
+    def test_decorator_for_update_key(self):
+        """ writing the result of the decorated function to a key
+        """
+        calls = []
+
+        @supycache.supycache(cache_key='user:{0}')
+        def get_user(user_id):
+            calls.append(user_id)
+            return {'id': user_id}
+
+        @supycache.supycache(update_key='user:{0}', expire_key='users')
+        def save_user(user_id, **fields):
+            return dict(fields, id=user_id)
+
+        self.backend.set('users', [1])
+        self.assertEqual(get_user(1), {'id': 1})
+        self.assertEqual(save_user(1, name='steve'),
+                         {'id': 1, 'name': 'steve'})
+        self.assertEqual(get_user(1), {'id': 1, 'name': 'steve'})
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.backend.get('users'), None)
+
+        @supycache.supycache(update_key='user:{0}')
+        def delete_user(user_id):
+            return None
+
+        delete_user(1)
+        self.assertEqual(get_user(1), {'id': 1})
+        self.assertEqual(calls, [1, 1])
+
+        with self.assertRaises(ValueError):
+            supycache.supycache(cache_key='user:{0}', update_key='user:{0}')(
+                delete_user)
+
+    def test_decorator_for_cache_key_max_age(self):
+        """ caching results for the max_age of each decorator, with jitter
+        """
+        from unittest import mock
+
+        @supycache.supycache(cache_key='short', max_age=10)
+        def short_lived():
+            return 'value'
+
+        @supycache.supycache(cache_key='long', max_age=100)
+        def long_lived():
+            return 'value'
+
+        @supycache.supycache(cache_key='jittered:{0}', max_age=100,
+                             ttl_jitter=0.5)
+        def jittered(key):
+            return 'value'
+
+        @supycache.supycache(cache_key='batch:{0}', max_age=100,
+                             ttl_jitter=0.5, batched=True)
+        def batch(keys):
+            return dict((key, 'value') for key in keys)
+
+        with mock.patch('time.time', return_value=1000):
+            short_lived()
+            long_lived()
+            for i in range(20):
+                jittered(i)
+            batch(range(20))
+
+        self.assertEqual(self.backend.data['short'][1], 1010)
+        self.assertEqual(self.backend.data['long'][1], 1100)
+        self.assertFalse('max_age' in self.backend.config)
+        for prefix in ('jittered', 'batch'):
+            expiries = set(self.backend.data['%s:%d' % (prefix, i)][1]
+                           for i in range(20))
+            self.assertTrue(len(expiries) > 1)
+            self.assertTrue(all(1050 <= expiry <= 1100
+                                for expiry in expiries))
+
+        for ttl_jitter in (-0.1, 1.5):
+            self.assertRaises(ValueError, supycache.supycache(
+                cache_key='bad', max_age=10, ttl_jitter=ttl_jitter),
+                lambda: 1)
+
+    def test_decorator_for_cache_key_hashing(self):
+        """ digesting the keys the backend does not allow
+        """
+        from supycache.keys import digest_key
+
+        self.backend.config['max_key_length'] = 20
+
+        @supycache.supycache(cache_key='{0}')
+        def simple_function(key):
+            return 'value_%s' % key
+
+        @supycache.supycache(cache_key='{0}', hash_keys=True,
+                             key_namespace='app:')
+        def hashed_function(key):
+            return 'value_%s' % key
+
+        long_key = 'a long key ' * 10
+        simple_function('short key')
+        simple_function(long_key)
+        hashed_function('short key')
+        self.assertEqual(sorted(self.backend.data), sorted([
+            'short key', digest_key(long_key), 'app:' + digest_key('short key')
+        ]))
+        self.assertEqual(simple_function(long_key), 'value_' + long_key)
+        self.assertEqual(simple_function.cache_info().hits, 1)
+
+    def test_decorator_for_cache_key_per_instance(self):
+        """ caching the results of methods for each instance
+        """
+        calls = []
+
+        class Account(object):
+            def __init__(self, balance):
+                self.balance = balance
+
+            @supycache.supycache(cache_key='{0}', per_instance=True)
+            def interest(self, rate):
+                calls.append(rate)
+                return self.balance * rate
+
+            @supycache.supycache(per_instance=True)
+            def total(self, *amounts):
+                calls.append(amounts)
+                return self.balance + sum(amounts)
+
+        first, second = Account(100), Account(200)
+        self.assertEqual(first.interest(2), 200)
+        self.assertEqual(second.interest(2), 400)
+        self.assertEqual(first.interest(2), 200)
+        self.assertEqual(first.total(1, 2), 103)
+        self.assertEqual(first.total(1, 2), 103)
+        self.assertEqual(second.total(1, 2), 203)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(self.backend.data), 0)
+
+
+    def test_decorator_for_cache_key_per_instance_garbage_collected(self):
+        """ dropping the results cached for instances once they are freed
+        """
+        import gc
+        import weakref
+        from supycache.backends import InstanceCache
+
+        cache = InstanceCache()
+
+        class Report(object):
+            @supycache.supycache(backend=cache, per_instance=True)
+            def render(self):
+                return 'x' * 1000
+
+        first, second = Report(), Report()
+        first.render()
+        second.render()
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.memory_used > 2000)
+        freed = weakref.ref(first)
+        del first
+        gc.collect()
+        self.assertTrue(freed() is None)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.memory_used < 2000)
+        cache.forget(second)
+        self.assertEqual(len(cache), 0)
+
+    def test_decorator_for_cache_key_per_instance_concurrent(self):
+        """ concurrent calls on different instances are not merged
+        """
+        import threading
+
+        started = threading.Event()
+        release = threading.Event()
+
+        class Account(object):
+            def __init__(self, balance):
+                self.balance = balance
+
+            @supycache.supycache(cache_key='{0}', per_instance=True,
+                                 single_flight=True)
+            def interest(self, rate):
+                started.set()
+                release.wait(5)
+                return self.balance * rate
+
+        first, second = Account(1), Account(100)
+        results = {}
+        thread = threading.Thread(
+            target=lambda: results.setdefault('first', first.interest(2)))
+        thread.start()
+        started.wait(5)
+        # - the first call is still running
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+        results['second'] = second.interest(2)
+        thread.join()
+        timer.join()
+        self.assertEqual(results, {'first': 2, 'second': 200})
+
+    def test_decorator_for_cache_key_per_instance_shared_backend(self):
+        """ caching the results of methods for each instance, in a backend
+        """
+        class Account(object):
+            def __init__(self, balance):
+                self.balance = balance
+
+            @supycache.supycache(backend=self.backend, cache_key='{0}',
+                                 per_instance=True)
+            def interest(self, rate):
+                return self.balance * rate
+
+        first, second = Account(100), Account(200)
+        self.assertEqual(first.interest(2), 200)
+        self.assertEqual(second.interest(2), 400)
+        self.assertEqual(first.interest(2), 200)
+        self.assertEqual(len(self.backend.data), 2)
+        self.assertEqual(Account.interest.cache_info().hits, 1)